@@ -16,8 +16,9 @@ DATABASE_URL = os.environ.get(
 )
 EXPORT_DIR = BASE_DIR / "exports"
 LOG_PATH = BASE_DIR / "logs" / "app.log"
+CACHE_DIR = BASE_DIR / "cache"
 
-for dir_path in [UPLOAD_DIR, VECTOR_DB_DIR, EXPORT_DIR, BASE_DIR / "db", BASE_DIR / "logs"]:
+for dir_path in [UPLOAD_DIR, VECTOR_DB_DIR, EXPORT_DIR, CACHE_DIR, BASE_DIR / "db", BASE_DIR / "logs"]:
     dir_path.mkdir(parents=True, exist_ok=True)
 
 # LLM and Embeddings
@@ -31,6 +32,8 @@ USE_POSTGRES = True
 
 # APIs (optional)
 SEMANTIC_SCHOLAR_API_KEY = None
+# Unpaywall requires a contact email on every request
+UNPAYWALL_EMAIL = os.environ.get("UNPAYWALL_EMAIL", "your@email.com")
 
 # Logging
 logging.basicConfig(
@@ -1,6 +1,6 @@
 # modules/citation_tool.py
 import streamlit as st
-from utils.api_helpers import fetch_by_doi, fetch_arxiv, fetch_papers
+from utils.api_helpers import fetch_by_doi, iter_arxiv, fetch_papers
 from utils.database import add_reference, get_references
 from utils.llm import ask_llm
 from config import logger
@@ -297,9 +297,9 @@ def auto_fetch_citation():
                 
                 # Try arXiv
                 if "arxiv" in query.lower():
-                    papers = fetch_arxiv(query)
-                    if papers:
-                        p = papers[0]
+                    # Only the best match is used, so stop after the first result
+                    p = next(iter_arxiv(query, limit=1), None)
+                    if p:
                         citation_data = {
                             'title': p.get('title', ''),
                             'authors': [a['name'] for a in p.get('authors', [])],
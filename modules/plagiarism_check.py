@@ -7,7 +7,7 @@ from config import logger
 from utils.document_handler import load_document, chunk_text
 import numpy as np
 import re
-from collections import defaultdict
+import hashlib
 from datetime import datetime
 from utils.user_data import (
     require_authentication,
@@ -133,66 +133,116 @@ def paragraph_level_analysis(original: str, checked: str) -> dict:
         logger.error(f"Paragraph analysis error: {e}")
         return {}
 
+# Uploaded files compared against in the database check
+DB_SUFFIXES = ('.pdf', '.txt', '.docx', '.tex')
+
+def _db_files(upload_dir: Path) -> list:
+    """Files in the upload directory that the database check scans."""
+    return [p for p in upload_dir.glob('*') if p.is_file() and p.suffix.lower() in DB_SUFFIXES]
+
 def check_against_database(checked_text: str, chunk_size=500, user_id=None) -> dict:
     """Advanced check against uploaded documents with chunk-level analysis."""
     try:
-        results = defaultdict(list)
-        
-        if user_id is None:
-            user_id = get_current_user_id()
-        
-        upload_dir = get_user_upload_dir(user_id)
-        if not upload_dir.exists():
-            return {}
+        matches, _ = _check_against_database(checked_text, user_id=user_id)
+    except Exception as e:
+        logger.error(f"Database check error: {e}")
+        return {}
+    return matches
+
+def _check_against_database(checked_text: str, user_id=None) -> tuple:
+    """Return (matches per file, per-file similarity arrays aligned with the matches).
+
+    Raises on embedding or database failures instead of reporting "no matches",
+    so a transient error is never memoized by `_cached_db_check`.
+    """
+    results = {}
+    results_sims = {}
+    
+    if user_id is None:
+        user_id = get_current_user_id()
+    
+    upload_dir = get_user_upload_dir(user_id)
+    if not upload_dir.exists():
+        return {}, {}
+    
+    # Get embeddings for checked text chunks
+    checked_chunks = chunk_text(checked_text)
+    if not checked_chunks:
+        return {}, {}
+    
+    checked_embs = get_embeddings(checked_chunks)
+    if not checked_embs:
+        raise RuntimeError("Embedding generation failed for the checked text")
+    
+    # Check against each document
+    for file_path in _db_files(upload_dir):
+        # An unreadable document is skipped; it fails the same way every time
+        try:
+            text, _ = load_document(file_path)
+        except Exception as e:
+            logger.error(f"Error checking {file_path.name}: {e}")
+            continue
+        if not text:
+            continue
         
-        # Get embeddings for checked text chunks
-        checked_chunks = chunk_text(checked_text)
-        if not checked_chunks:
-            return {}
+        # Chunk the document
+        doc_chunks = chunk_text(text)
+        if not doc_chunks:
+            continue
         
-        checked_embs = get_embeddings(checked_chunks)
-        if not checked_embs:
-            return {}
+        doc_embs = get_embeddings(doc_chunks)
+        if not doc_embs:
+            raise RuntimeError(f"Embedding generation failed for {file_path.name}")
         
-        # Check against each document
-        for file_path in upload_dir.glob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in ['.pdf', '.txt', '.docx', '.tex']:
-                try:
-                    text, _ = load_document(file_path)
-                    if not text:
-                        continue
-                    
-                    # Chunk the document
-                    doc_chunks = chunk_text(text)
-                    if not doc_chunks:
-                        continue
-                    
-                    doc_embs = get_embeddings(doc_chunks)
-                    if not doc_embs:
-                        continue
-                    
-                    # Find matching chunks
-                    for i, checked_emb in enumerate(checked_embs):
-                        similarities = cosine_similarity([checked_emb], doc_embs)[0]
-                        max_sim = float(np.max(similarities))
-                        max_idx = int(np.argmax(similarities))
-                        
-                        if max_sim > 0.70:  # Threshold for match
-                            results[file_path.name].append({
-                                'chunk_num': i + 1,
-                                'similarity': max_sim,
-                                'checked_chunk': checked_chunks[i],
-                                'matched_chunk': doc_chunks[max_idx]
-                            })
-                
-                except Exception as e:
-                    logger.error(f"Error checking {file_path.name}: {e}")
-                    continue
+        # Find matching chunks (one similarity matrix per document)
+        similarities = cosine_similarity(checked_embs, doc_embs)
+        max_idxs = similarities.argmax(axis=1)
+        max_sims = similarities[np.arange(len(max_idxs)), max_idxs]
+        hits = np.flatnonzero(max_sims > 0.70)  # Threshold for match
+        if not hits.size:
+            continue
         
-        return dict(results)
-    except Exception as e:
-        logger.error(f"Database check error: {e}")
-        return {}
+        results[file_path.name] = [{
+            'chunk_num': int(i) + 1,
+            'similarity': float(max_sims[i]),
+            'checked_chunk': checked_chunks[i],
+            'matched_chunk': doc_chunks[max_idxs[i]]
+        } for i in hits]
+        results_sims[file_path.name] = max_sims[hits]
+    
+    return results, results_sims
+
+def _upload_files_signature(user_id=None) -> tuple:
+    """(name, mtime_ns, size) of every scanned upload; changes when any file is added, removed or rewritten."""
+    upload_dir = get_user_upload_dir(user_id)
+    signature = []
+    if not upload_dir.exists():
+        return ()
+    for file_path in _db_files(upload_dir):
+        try:
+            stat = file_path.stat()
+        except OSError:
+            continue
+        signature.append((file_path.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(signature))
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _cached_db_check(text_hash: str, _text: str, user_id=None, files_signature: tuple = ()) -> tuple:
+    """Memoized `_check_against_database`, keyed by text hash, user and the uploaded files' state."""
+    return _check_against_database(_text, user_id=user_id)
+
+def cached_check_against_database(checked_text: str, user_id=None) -> tuple:
+    """Check against the database, reusing results for text already checked this session.
+
+    Failures raise and are not cached, so the next call retries.
+
+    Returns:
+        Tuple of (matches per file, similarity ndarray per file).
+    """
+    if user_id is None:
+        user_id = get_current_user_id()
+    text_hash = hashlib.md5(checked_text.encode()).hexdigest()
+    return _cached_db_check(text_hash, checked_text, user_id, _upload_files_signature(user_id))
 
 def detect_paraphrasing(text: str) -> dict:
     """Use LLM to detect sophisticated paraphrasing patterns."""
@@ -291,7 +341,7 @@ def main():
                         # 1. Check against database
                         st.write("**Step 1/3:** Checking against uploaded documents...")
                         user_id = get_current_user_id()
-                        db_matches = check_against_database(text_to_check, user_id=user_id)
+                        db_matches, db_sims = cached_check_against_database(text_to_check, user_id=user_id)
                         log_user_action("plagiarism_check", f"Checked {len(text_to_check)} characters")
                         
                         # 2. AI Paraphrasing Detection
@@ -307,10 +357,7 @@ def main():
                         
                         # Overall similarity score
                         if db_matches:
-                            max_similarity = max([
-                                max([m['similarity'] for m in matches])
-                                for matches in db_matches.values()
-                            ])
+                            max_similarity = float(max(a.max() for a in db_sims.values()))
                         else:
                             max_similarity = 0.0
                         
@@ -343,7 +390,7 @@ def main():
                         if db_matches:
                             st.write("### 🗄️ Database Matches Found")
                             for filename, matches in db_matches.items():
-                                avg_sim = np.mean([m['similarity'] for m in matches])
+                                avg_sim = db_sims[filename].mean()
                                 with st.expander(f"📄 {filename} - {len(matches)} matches (avg: {avg_sim:.1%})"):
                                     for i, match in enumerate(matches[:5], 1):  # Show top 5
                                         st.write(f"**Match {i}** (Similarity: {match['similarity']:.1%})")
@@ -562,7 +609,7 @@ def main():
                 with st.spinner("Searching through uploaded documents..."):
                     try:
                         user_id = get_current_user_id()
-                        matches = check_against_database(checked_text_db, user_id=user_id)
+                        matches, match_sims = cached_check_against_database(checked_text_db, user_id=user_id)
                         log_user_action("plagiarism_db_search", f"Searched database for matches")
                         
                         if matches:
@@ -571,13 +618,13 @@ def main():
                             # Sort by average similarity
                             sorted_matches = []
                             for filename, match_list in matches.items():
-                                avg_sim = np.mean([m['similarity'] for m in match_list])
+                                avg_sim = match_sims[filename].mean()
                                 sorted_matches.append((filename, match_list, avg_sim))
                             sorted_matches.sort(key=lambda x: x[2], reverse=True)
                             
                             # Display matches
                             for filename, match_list, avg_sim in sorted_matches:
-                                max_sim = max([m['similarity'] for m in match_list])
+                                max_sim = match_sims[filename].max()
                                 
                                 with st.expander(f"📄 {filename} - {len(match_list)} matches (max: {max_sim:.1%}, avg: {avg_sim:.1%})"):
                                     if max_sim > 0.85:
@@ -1,13 +1,25 @@
 # modules/topic_finder.py
 import streamlit as st
 from pathlib import Path
-from utils.document_handler import load_document
-from utils.nlp_helpers import extract_topics
-from utils.llm import ask_llm, get_embeddings
+from utils.document_cache import load_document_cached
+from utils.nlp_helpers import iter_topic_counts
+from utils.embedding_cache import cached_embeddings
+from utils.semantic_cache import cached_ask_llm
 from utils.api_helpers import fetch_papers
 from config import logger
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
+import pandas as pd
+import html
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+# SimSIMD is optional; without it cosine similarity falls back to NumPy.
+try:
+    import simsimd as simd
+    HAS_SIMSIMD = True
+except ImportError:
+    simd = None
+    HAS_SIMSIMD = False
 from utils.user_data import (
     require_authentication,
     get_user_upload_dir,
@@ -15,6 +27,155 @@ from utils.user_data import (
     get_current_user_id,
 )
 
+# Maximum characters analyzed per depth setting
+DEPTH_LIMITS = {"Quick": 10000, "Standard": 50000, "Deep": 200000}
+
+TOPIC_CHIP_STYLE = (
+    "<style>.topic-chip{display:inline-block;margin:0 0.4rem 0.4rem 0;padding:0.2rem 0.7rem;"
+    "border:1px solid rgba(128,128,128,0.4);border-radius:1rem;font-size:0.9rem;}</style>"
+)
+
+# Broad research areas used to score document topics against current trends
+TRENDING_KEYWORDS = (
+    "artificial intelligence machine learning",
+    "climate change sustainability",
+    "healthcare medicine genomics",
+    "quantum computing technology",
+    "social media digital transformation",
+)
+
+@st.cache_resource(show_spinner=False)
+def _trending_matrix() -> np.ndarray:
+    """L2-normalized float32 embeddings of TRENDING_KEYWORDS, shared by all sessions."""
+    embeddings = cached_embeddings(list(TRENDING_KEYWORDS))
+    if not embeddings:
+        # Raising keeps the failure out of the resource cache so the next click retries
+        raise ValueError("Could not embed trending keywords")
+    X = np.array(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    np.divide(X, norms, out=X, where=norms > 0)
+    return X
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_fetch_papers_or_raise(query: str, limit: int) -> list:
+    papers = fetch_papers(query, limit=limit)
+    if not papers:
+        # Raising keeps a transient API failure from being pinned in the cache for an hour
+        raise LookupError(f"No papers returned for {query!r}")
+    return papers
+
+def _cached_fetch_papers(query: str, limit: int) -> list:
+    """`fetch_papers` memoized per (query, limit) for an hour across reruns and sessions."""
+    try:
+        return _cached_fetch_papers_or_raise(query, limit)
+    except LookupError:
+        return []
+
+def _research_directions_prompt(domain: str, topic: str) -> str:
+    return f"""Based on current trends in {domain}, suggest 3 specific research directions for the topic: {topic}.
+
+For each direction provide:
+1. Research question
+2. Why it's important
+3. Potential methodology
+
+Format as bullet points."""
+
+def _parse_json_response(text: str):
+    """Parse JSON from an LLM reply, tolerating ```json fenced blocks and surrounding prose."""
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        pass
+    fenced = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+    bare = re.search(r"\{.*\}", text, re.DOTALL)
+    for candidate in (fenced and fenced.group(1), bare and bare.group(0)):
+        if not candidate:
+            continue
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    return None
+
+def _batched_research_directions(domain: str, topics: list) -> dict:
+    """Ask for research directions on all topics in one LLM call.
+
+    Returns:
+        Mapping of topic -> markdown bullet list; empty if the reply can't be parsed.
+    """
+    prompt = f"""Based on current trends in {domain}, suggest 3 specific research directions for each topic below.
+
+Topics: {json.dumps(topics)}
+
+Respond with only a JSON object mapping each topic (exactly as written) to a list of 3 objects with the keys "question", "importance" and "methodology"."""
+    
+    parsed = _parse_json_response(cached_ask_llm(prompt, namespace="topic_finder.trending_directions", temperature=0.7))
+    if not isinstance(parsed, dict):
+        return {}
+    
+    directions = {}
+    for topic in topics:
+        entries = parsed.get(topic)
+        if not isinstance(entries, list):
+            continue
+        directions[topic] = "\n".join(
+            f"- **{d.get('question', '')}**\n  - *Why it's important:* {d.get('importance', '')}\n  - *Methodology:* {d.get('methodology', '')}"
+            for d in entries if isinstance(d, dict)
+        )
+    return directions
+
+def _extract_topics_streaming(text: str, top_n: int, cache_key: tuple) -> list:
+    """Extract topics shard by shard, showing the running top-N as shards complete.
+
+    Results are remembered per session under `cache_key` so re-running the same
+    document/settings is instant.
+    """
+    topic_cache = st.session_state.setdefault("topic_extraction_cache", {})
+    if cache_key in topic_cache:
+        return topic_cache[cache_key]
+    
+    topics = []
+    progress = st.empty()
+    for counts in iter_topic_counts(text):
+        topics = [word for word, count in counts.most_common(top_n)]
+        progress.caption(f"Topics so far: {', '.join(topics)}")
+    progress.empty()
+    
+    if topics:
+        topic_cache[cache_key] = topics
+    return topics
+
+def quantize_i8(X) -> tuple:
+    """Symmetric per-row int8 quantization.
+
+    Returns:
+        Tuple of (int8 matrix, per-row float32 scales) with X ≈ Q * scales[:, None].
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+    scales = np.abs(X).max(axis=1, keepdims=True) / 127.0
+    scales[scales == 0] = 1.0
+    return np.round(X / scales).astype(np.int8), scales.squeeze(axis=1)
+
+@st.cache_resource(show_spinner=False)
+def _trending_matrix_i8() -> np.ndarray:
+    """int8 copy of the trending matrix for SimSIMD's integer cosine kernel."""
+    # Cosine is invariant to per-row scaling, so the scales aren't needed for ranking
+    quantized, _ = quantize_i8(_trending_matrix())
+    return quantized
+
+def _trending_similarities(query) -> np.ndarray:
+    """Cosine similarity of a query embedding against each of TRENDING_KEYWORDS."""
+    if HAS_SIMSIMD:
+        q_i8, _ = quantize_i8(query)
+        return 1.0 - np.asarray(simd.cdist(q_i8, _trending_matrix_i8(), metric="cosine"), dtype=np.float32)[0]
+    # Fused path: normalize the query in place, then one GEMV against the pre-normalized rows
+    q = np.array(query, dtype=np.float32)
+    norm = np.linalg.norm(q)
+    if norm > 0:
+        q /= norm
+    return np.dot(_trending_matrix(), q)
+
 def get_trending_topics_by_domain():
     """Get trending research topics by domain"""
     st.write("### 🌟 Trending Research Topics")
@@ -41,11 +202,22 @@ def get_trending_topics_by_domain():
             
             st.write(f"#### Top Trending Topics in {selected_domain}")
             
-            for i, topic in enumerate(trending, 1):
+            # Fetch recent papers for all topics concurrently; the calls are I/O-bound
+            with ThreadPoolExecutor(max_workers=len(trending)) as executor:
+                paper_futures = [executor.submit(_cached_fetch_papers, topic, 5) for topic in trending]
+                
+                # One LLM round trip for every topic's research directions, overlapping the fetches
+                try:
+                    directions = _batched_research_directions(selected_domain, trending)
+                except Exception as e:
+                    logger.error(f"Batched research directions failed: {e}")
+                    directions = {}
+            
+            for i, (topic, papers_future) in enumerate(zip(trending, paper_futures), 1):
                 with st.expander(f"{i}. {topic.title()} 📈"):
                     # Fetch recent papers on this topic
                     try:
-                        papers = fetch_papers(topic, limit=5)
+                        papers = papers_future.result()
                         if papers:
                             st.write(f"**Recent Research ({len(papers)} papers):**")
                             for paper in papers[:3]:
@@ -53,17 +225,14 @@ def get_trending_topics_by_domain():
                                 if paper.get('year'):
                                     st.caption(f"Year: {paper['year']}")
                         
-                        # Generate research directions
-                        prompt = f"""Based on current trends in {selected_domain}, suggest 3 specific research directions for the topic: {topic}.
-                        
-For each direction provide:
-1. Research question
-2. Why it's important
-3. Potential methodology
-
-Format as bullet points."""
-                        
-                        suggestions = ask_llm(prompt, temperature=0.7)
+                        # Generate research directions (per-topic call only if the batched reply was unusable)
+                        suggestions = directions.get(topic)
+                        if not suggestions:
+                            suggestions = cached_ask_llm(
+                                _research_directions_prompt(selected_domain, topic),
+                                namespace="topic_finder.trending_directions",
+                                temperature=0.7,
+                            )
                         st.write("**Research Directions:**")
                         st.markdown(suggestions)
                         
@@ -96,14 +265,14 @@ def extract_topics_from_document():
         
         with st.spinner("Analyzing document..."):
             try:
-                text, metadata = load_document(file_path)
+                text, metadata = load_document_cached(file_path)
                 
                 # Limit text based on analysis depth
-                depth_limits = {"Quick": 10000, "Standard": 50000, "Deep": 200000}
-                text_to_analyze = text[:depth_limits[analysis_depth]]
+                text_to_analyze = text[:DEPTH_LIMITS[analysis_depth]]
                 
-                # Extract topics using NLP
-                topics = extract_topics(text_to_analyze, top_n=num_topics)
+                # Extract topics using NLP (sharded across worker processes for long texts)
+                cache_key = (selected_file, file_path.stat().st_mtime, num_topics, analysis_depth)
+                topics = _extract_topics_streaming(text_to_analyze, num_topics, cache_key)
                 log_user_action("topic_extraction_start", f"Extracting {num_topics} topics from {selected_file}")
                 
                 if not topics:
@@ -114,11 +283,9 @@ def extract_topics_from_document():
                 # Display topics
                 st.write(f"#### Extracted {len(topics)} Topics:")
                 
-                # Create columns for topics
-                cols = st.columns(3)
-                for i, topic in enumerate(topics):
-                    with cols[i % 3]:
-                        st.button(f"🏷️ {topic}", key=f"topic_{i}", disabled=True)
+                # Render all topics as chips in a single element
+                chips_html = "".join(f'<span class="topic-chip">🏷️ {html.escape(topic)}</span>' for topic in topics)
+                st.markdown(TOPIC_CHIP_STYLE + chips_html, unsafe_allow_html=True)
                 
                 # Advanced analysis
                 st.write("---")
@@ -141,7 +308,9 @@ Format as:
 
 **Related Research Areas:** [suggestions]"""
                 
-                analysis = ask_llm(prompt, temperature=0.4)
+                # Exact match only: the fixed template dominates the embedding, so a
+                # similarity hit could return another user's document themes
+                analysis = cached_ask_llm(prompt, namespace="topic_finder.document_themes", temperature=0.4, exact=True)
                 st.markdown(analysis)
                 log_user_action("topic_extraction_complete", f"Successfully extracted {len(topics)} topics")
                 
@@ -151,27 +320,19 @@ Format as:
                 
                 # Get embeddings for extracted topics
                 topic_text = " ".join(topics)
-                topic_emb = get_embeddings([topic_text])
-                
-                # Compare with some trending topics
-                trending_keywords = [
-                    "artificial intelligence machine learning",
-                    "climate change sustainability",
-                    "healthcare medicine genomics",
-                    "quantum computing technology",
-                    "social media digital transformation"
-                ]
+                topic_emb = cached_embeddings([topic_text])
                 
-                trending_embs = get_embeddings(trending_keywords)
-                
-                if topic_emb and trending_embs:
-                    similarities = cosine_similarity([topic_emb[0]], trending_embs)[0]
+                if topic_emb:
+                    # Trending embeddings are computed once and reused across clicks/sessions
+                    similarities = _trending_similarities(topic_emb[0])
                     
-                    # Create a simple bar chart
-                    st.write("Relevance to trending areas:")
-                    for keyword, sim in zip(trending_keywords, similarities):
-                        relevance = f"{sim * 100:.1f}%"
-                        st.progress(float(sim), text=f"{keyword.title()}: {relevance}")
+                    # Single bar chart instead of one progress widget per keyword
+                    st.write("Relevance to trending areas (%):")
+                    relevance = pd.DataFrame(
+                        {"Relevance (%)": similarities * 100},
+                        index=pd.Index([keyword.title() for keyword in TRENDING_KEYWORDS], name="Trending area"),
+                    )
+                    st.bar_chart(relevance, horizontal=True)
                 
             except Exception as e:
                 st.error(f"Error: {str(e)}")
@@ -211,27 +372,34 @@ For each topic provide:
 
 Make topics current, feasible, and impactful."""
             
-            suggestions = ask_llm(prompt, temperature=0.8)
-            st.markdown(suggestions)
-            
-            # Option to search related papers
-            if st.button("🔍 Find Related Papers"):
-                with st.spinner("Searching..."):
-                    try:
-                        papers = fetch_papers(research_area, limit=10)
-                        if papers:
-                            st.write(f"#### Found {len(papers)} Related Papers:")
-                            for paper in papers[:5]:
-                                with st.expander(f"📄 {paper.get('title', 'Untitled')[:80]}..."):
-                                    st.write(f"**Year:** {paper.get('year', 'N/A')}")
-                                    authors = paper.get('authors', [])
-                                    if authors:
-                                        st.write(f"**Authors:** {', '.join([a.get('name', '') for a in authors[:3]])}")
-                                    if paper.get('abstract'):
-                                        st.write(f"**Abstract:** {paper['abstract'][:300]}...")
-                    except Exception as e:
-                        st.warning("Could not fetch papers.")
-                        logger.error(f"Paper fetch error: {e}")
+            suggestions = cached_ask_llm(prompt, namespace="topic_finder.topic_suggestions", temperature=0.8)
+            # Persist across reruns so the button below doesn't discard (and re-pay for) them
+            st.session_state["topic_suggestions"] = {"area": research_area, "text": suggestions}
+    
+    saved = st.session_state.get("topic_suggestions")
+    if not saved:
+        return
+    
+    st.markdown(saved["text"])
+    
+    # Option to search related papers
+    if st.button("🔍 Find Related Papers"):
+        with st.spinner("Searching..."):
+            try:
+                papers = _cached_fetch_papers(saved["area"], 10)
+                if papers:
+                    st.write(f"#### Found {len(papers)} Related Papers:")
+                    for paper in papers[:5]:
+                        with st.expander(f"📄 {paper.get('title', 'Untitled')[:80]}..."):
+                            st.write(f"**Year:** {paper.get('year', 'N/A')}")
+                            authors = paper.get('authors', [])
+                            if authors:
+                                st.write(f"**Authors:** {', '.join([a.get('name', '') for a in authors[:3]])}")
+                            if paper.get('abstract'):
+                                st.write(f"**Abstract:** {paper['abstract'][:300]}...")
+            except Exception as e:
+                st.warning("Could not fetch papers.")
+                logger.error(f"Paper fetch error: {e}")
 
 @require_authentication
 def main():
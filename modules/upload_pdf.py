@@ -1,7 +1,10 @@
 # modules/upload_pdf.py
 import streamlit as st
+import shutil
 from pathlib import Path
-from utils.document_handler import load_document, chunk_text, create_vector_store
+from concurrent.futures import ThreadPoolExecutor
+from utils.document_handler import chunk_text, create_vector_store
+from utils.document_cache import load_document_cached
 from utils.database import add_reference  # For metadata
 from utils.user_data import (
     require_authentication, 
@@ -36,30 +39,41 @@ def main():
         user_upload_dir = get_user_upload_dir()
         file_path = user_upload_dir / uploaded_file.name
         
-        # Save file to user's directory
+        # Save file to user's directory, streaming 1 MB at a time
+        uploaded_file.seek(0)
         with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+            shutil.copyfileobj(uploaded_file, f, length=1 << 20)
         
         log_user_action("upload_file", f"filename={uploaded_file.name} size={uploaded_file.size}")
         
         try:
             with st.spinner("Processing document..."):
-                text, metadata = load_document(file_path)
+                # Parsed through the shared cache so other tabs reuse this extraction
+                text, metadata = load_document_cached(file_path)
                 chunks = chunk_text(text)
+                # Keep only the preview slice; the full text isn't needed past chunking
+                preview = text[:1000] + ("..." if len(text) > 1000 else "")
+                del text
                 
-                # Create vector store in user-specific directory
                 user_vdb_dir = get_user_vector_db_dir()
-                create_vector_store(chunks, uploaded_file.name, store_dir=user_vdb_dir)
-                
-                # Add to DB if metadata available
-                if metadata.get("title"):
-                    add_reference(
-                        metadata.get("title", uploaded_file.name),
-                        metadata.get("author", "Unknown"),
-                        metadata.get("creationDate", "Unknown")[:4],  # Year approx
-                        metadata.get("doi", ""),
-                        ""  # BibTeX placeholder
-                    )
+                with ThreadPoolExecutor(max_workers=4) as executor:
+                    # Add to DB if metadata available (runs alongside the embedding batches)
+                    reference_future = None
+                    if metadata.get("title"):
+                        reference_future = executor.submit(
+                            add_reference,
+                            metadata.get("title", uploaded_file.name),
+                            metadata.get("author", "Unknown"),
+                            metadata.get("creationDate", "Unknown")[:4],  # Year approx
+                            metadata.get("doi", ""),
+                            ""  # BibTeX placeholder
+                        )
+                    
+                    # Create vector store in user-specific directory, embedding chunk batches concurrently
+                    create_vector_store(chunks, uploaded_file.name, store_dir=user_vdb_dir, executor=executor)
+                    
+                    if reference_future is not None:
+                        reference_future.result()
                 
                 log_user_action("document_processed", f"filename={uploaded_file.name} chunks={len(chunks)}")
                 
@@ -68,7 +82,7 @@ def main():
             
             # Show document preview
             with st.expander("📖 Document Preview"):
-                st.text(text[:1000] + "..." if len(text) > 1000 else text)
+                st.text(preview)
             
         except ValueError as e:
             st.error(f"❌ Error: {str(e)}")
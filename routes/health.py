@@ -5,11 +5,49 @@ Used for monitoring dashboard and automated health checks
 """
 
 from fastapi import APIRouter, Response
+# orjson is optional; it serializes the probe responses faster than stdlib json
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as JSONResponse
+except ImportError:
+    from fastapi.responses import JSONResponse
 from utils.db_connection import health_check as db_health_check
 from config import logger
+import asyncio
+import json
 import time
 
-router = APIRouter(prefix="/api/health", tags=["health"])
+router = APIRouter(prefix="/api/health", tags=["health"], default_response_class=JSONResponse)
+
+# Healthy DB results are reused briefly so bursts of probes share one DB round trip
+HEALTH_CACHE_TTL = 2.0
+_health_cache = {"t": 0.0, "v": None}
+_health_lock = asyncio.Lock()
+
+
+def _fresh_health(ttl: float):
+    if _health_cache["v"] is not None and time.monotonic() - _health_cache["t"] < ttl:
+        return _health_cache["v"]
+    return None
+
+
+async def _cached_health(ttl: float = HEALTH_CACHE_TTL) -> dict:
+    """
+    Database health, reusing the last healthy result for `ttl` seconds
+    Unhealthy results are never cached so outages show up on the next probe
+    """
+    cached = _fresh_health(ttl)
+    if cached is not None:
+        return cached
+    async with _health_lock:
+        # Another probe may have refreshed the cache while we waited
+        cached = _fresh_health(ttl)
+        if cached is not None:
+            return cached
+        db_status = db_health_check()
+        if db_status["status"] == "healthy":
+            _health_cache.update(t=time.monotonic(), v=db_status)
+        return db_status
 
 @router.get("/")
 async def health_check():
@@ -17,7 +55,7 @@ async def health_check():
     Basic health check endpoint
     Returns 200 if healthy, 503 if database unavailable
     """
-    db_status = db_health_check()
+    db_status = await _cached_health()
     
     if db_status["status"] == "healthy":
         return {
@@ -26,7 +64,7 @@ async def health_check():
             "database": db_status
         }
     else:
-        return Response(
+        return JSONResponse(
             content={"status": "unhealthy", "database": db_status},
             status_code=503
         )
@@ -37,7 +75,7 @@ async def detailed_health():
     Detailed health check with all metrics
     Useful for monitoring dashboards
     """
-    db_status = db_health_check()
+    db_status = await _cached_health()
     
     return {
         "status": db_status["status"],
@@ -55,20 +93,28 @@ async def readiness():
     Kubernetes-style readiness probe
     Returns 200 only if all dependencies are ready
     """
-    db_status = db_health_check()
+    db_status = await _cached_health()
     
     if db_status["status"] == "healthy":
         return {"ready": True}
     else:
-        return Response(
+        return JSONResponse(
             content={"ready": False, "reason": "Database unavailable"},
             status_code=503
         )
 
+# Pre-serialized liveness body, rebuilt at most once per second
+_live_body = {"second": None, "body": b""}
+
+
 @router.get("/live")
 async def liveness():
     """
     Kubernetes-style liveness probe
     Returns 200 if the service is alive (even if degraded)
     """
-    return {"alive": True, "timestamp": time.time()}
+    now = time.time()
+    second = int(now)
+    if _live_body["second"] != second:
+        _live_body.update(second=second, body=json.dumps({"alive": True, "timestamp": now}).encode())
+    return Response(content=_live_body["body"], media_type="application/json")
@@ -0,0 +1,16 @@
+"""
+Shared setup for the scripts in this folder.
+Puts the project root on sys.path once so `config` and `utils` resolve,
+and re-exports the config objects the scripts use.
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config import logger, BASE_DIR, UPLOAD_DIR, VECTOR_DB_DIR  # noqa: E402
+
+__all__ = ["ROOT", "logger", "BASE_DIR", "UPLOAD_DIR", "VECTOR_DB_DIR"]
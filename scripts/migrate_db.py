@@ -7,6 +7,8 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import atexit
+from contextlib import contextmanager
 from datetime import datetime
 from typing import List, Callable
 from config import logger, USE_POSTGRES, DATABASE_URL, DB_PATH
@@ -35,40 +37,61 @@ class MigrationManager:
     
     def __init__(self):
         self.migrations: List[Migration] = []
+        self._current_version = None  # Cached until a migration is applied or rolled back
+        self._use_postgres = USE_POSTGRES and psycopg is not None
+        self._placeholder = "%s" if self._use_postgres else "?"
+        # One connection for the manager's lifetime instead of one per call
+        self._conn = self._get_connection()
+        atexit.register(self.close)
         self._init_migration_table()
     
     def _get_connection(self):
         """Get database connection."""
-        if USE_POSTGRES and psycopg is not None:
+        if self._use_postgres:
             return psycopg.connect(DATABASE_URL)
         else:
             return sqlite3.connect(DB_PATH)
     
+    def close(self):
+        """Close the manager's connection (safe to call more than once)."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    @contextmanager
+    def _txn(self):
+        """Yield a cursor; commit on success, roll back on any error."""
+        cursor = self._conn.cursor()
+        try:
+            yield cursor
+            self._conn.commit()
+        except Exception:
+            self._conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    
     def _init_migration_table(self):
         """Create migrations table if it doesn't exist."""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
+            with self._txn() as cursor:
+                if self._use_postgres:
+                    cursor.execute("""
+                        CREATE TABLE IF NOT EXISTS schema_migrations (
+                            version INTEGER PRIMARY KEY,
+                            name TEXT NOT NULL,
+                            applied_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+                        )
+                    """)
+                else:
+                    cursor.execute("""
+                        CREATE TABLE IF NOT EXISTS schema_migrations (
+                            version INTEGER PRIMARY KEY,
+                            name TEXT NOT NULL,
+                            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                        )
+                    """)
             
-            if USE_POSTGRES and psycopg is not None:
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS schema_migrations (
-                        version INTEGER PRIMARY KEY,
-                        name TEXT NOT NULL,
-                        applied_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-            else:
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS schema_migrations (
-                        version INTEGER PRIMARY KEY,
-                        name TEXT NOT NULL,
-                        applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-            
-            conn.commit()
-            conn.close()
             logger.info("Migration table initialized")
             
         except Exception as e:
@@ -82,15 +105,16 @@ class MigrationManager:
     
     def get_current_version(self) -> int:
         """Get the current schema version."""
+        if self._current_version is not None:
+            return self._current_version
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT MAX(version) FROM schema_migrations")
-            result = cursor.fetchone()
-            conn.close()
+            with self._txn() as cursor:
+                # Walks the primary-key index from the top instead of aggregating
+                cursor.execute("SELECT version FROM schema_migrations ORDER BY version DESC LIMIT 1")
+                result = cursor.fetchone()
             
-            return result[0] if result and result[0] is not None else 0
+            self._current_version = result[0] if result else 0
+            return self._current_version
             
         except Exception as e:
             logger.warning(f"Could not get current version: {e}")
@@ -101,46 +125,49 @@ class MigrationManager:
         current_version = self.get_current_version()
         return [m for m in self.migrations if m.version > current_version]
     
-    def apply_migration(self, migration: Migration) -> bool:
-        """Apply a single migration."""
-        try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            logger.info(f"Applying migration {migration.version}: {migration.name}")
-            
-            # Execute migration SQL
-            for statement in migration.up_sql.split(';'):
-                statement = statement.strip()
-                if statement:
-                    cursor.execute(statement)
+    def _execute_script(self, cursor, sql: str):
+        """Execute a multi-statement SQL script inside the current transaction."""
+        if self._use_postgres:
+            # psycopg sends unparameterized multi-statement strings in one round trip
+            cursor.execute(sql)
+        else:
+            # executescript() commits any open transaction first, so the script opens
+            # its own; the statements after it join that same transaction
+            cursor.executescript("BEGIN;\n" + sql)
+    
+    def _apply_batch(self, migrations: List[Migration]):
+        """Apply and record `migrations` in a single transaction (all or nothing)."""
+        self._current_version = None
+        with self._txn() as cursor:
+            for migration in migrations:
+                logger.info(f"Applying migration {migration.version}: {migration.name}")
             
-            # Record migration
-            if USE_POSTGRES and psycopg is not None:
-                cursor.execute(
-                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
-                    (migration.version, migration.name)
-                )
+            if self._use_postgres:
+                for migration in migrations:
+                    self._execute_script(cursor, migration.up_sql)
             else:
-                cursor.execute(
-                    "INSERT INTO schema_migrations (version, name) VALUES (?, ?)",
-                    (migration.version, migration.name)
-                )
-            
-            conn.commit()
-            conn.close()
+                # One script for the whole batch; a second executescript() would commit the first
+                self._execute_script(cursor, "\n".join(m.up_sql.strip().rstrip(";") + ";" for m in migrations))
             
+            # Record migrations
+            cursor.executemany(
+                f"INSERT INTO schema_migrations (version, name) VALUES ({self._placeholder}, {self._placeholder})",
+                [(m.version, m.name) for m in migrations]
+            )
+    
+    def apply_migration(self, migration: Migration) -> bool:
+        """Apply a single migration."""
+        try:
+            self._apply_batch([migration])
             logger.info(f"✅ Migration {migration.version} applied successfully")
             return True
             
         except Exception as e:
             logger.error(f"❌ Migration {migration.version} failed: {e}")
-            conn.rollback()
-            conn.close()
             return False
     
     def migrate_to_latest(self) -> bool:
-        """Apply all pending migrations."""
+        """Apply all pending migrations in one transaction."""
         pending = self.get_pending_migrations()
         
         if not pending:
@@ -149,10 +176,13 @@ class MigrationManager:
         
         logger.info(f"Found {len(pending)} pending migration(s)")
         
-        for migration in pending:
-            if not self.apply_migration(migration):
-                logger.error(f"Migration stopped at version {migration.version}")
-                return False
+        try:
+            self._apply_batch(pending)
+        except Exception as e:
+            logger.error(
+                f"❌ Migrations v{pending[0].version}-v{pending[-1].version} failed and were rolled back: {e}"
+            )
+            return False
         
         logger.info(f"✅ All migrations applied. Current version: {self.get_current_version()}")
         return True
@@ -163,34 +193,25 @@ class MigrationManager:
             logger.error(f"No rollback defined for migration {migration.version}")
             return False
         
+        self._current_version = None
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            logger.info(f"Rolling back migration {migration.version}: {migration.name}")
-            
-            # Execute rollback SQL
-            for statement in migration.down_sql.split(';'):
-                statement = statement.strip()
-                if statement:
-                    cursor.execute(statement)
-            
-            # Remove migration record
-            cursor.execute(
-                "DELETE FROM schema_migrations WHERE version = ?",
-                (migration.version,)
-            )
-            
-            conn.commit()
-            conn.close()
+            with self._txn() as cursor:
+                logger.info(f"Rolling back migration {migration.version}: {migration.name}")
+                
+                # Execute rollback SQL
+                self._execute_script(cursor, migration.down_sql)
+                
+                # Remove migration record
+                cursor.execute(
+                    f"DELETE FROM schema_migrations WHERE version = {self._placeholder}",
+                    (migration.version,)
+                )
             
             logger.info(f"✅ Migration {migration.version} rolled back")
             return True
             
         except Exception as e:
             logger.error(f"❌ Rollback failed: {e}")
-            conn.rollback()
-            conn.close()
             return False
     
     def show_status(self):
@@ -202,7 +223,7 @@ class MigrationManager:
         print("DATABASE MIGRATION STATUS")
         print("="*60)
         print(f"Current Version: {current}")
-        print(f"Database: {'PostgreSQL' if (USE_POSTGRES and psycopg) else 'SQLite'}")
+        print(f"Database: {'PostgreSQL' if self._use_postgres else 'SQLite'}")
         print(f"Pending Migrations: {len(pending)}")
         print("="*60)
         
@@ -3,177 +3,216 @@ Database Seed Script
 Populates database with demo data for testing and development.
 """
 
+import io
+import itertools
+import os
 import sys
-from pathlib import Path
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from _bootstrap import logger, BASE_DIR, UPLOAD_DIR, VECTOR_DB_DIR
 from utils.auth import get_auth_manager
-from utils.database import add_reference
-from config import logger
+from utils.database import add_references_bulk
+
+# bcrypt (rounds=12) hashes of the demo passwords printed by seed_all();
+# precomputed so seeding does not pay the KDF cost on every run
+_DEMO_HASHES = {
+    "demo": "$2b$12$U7Q3zJ3J.jAKY/xX0bH1XeNOhXh0Pcp1iFzgSHz8DccfjYi9e39C2",  # Demo123456
+    "researcher": "$2b$12$MvmhPq4CXidzmL8ALym0perurj3g4SiKJKQT9KLbfPURROBiinhe2",  # Research123
+    "student": "$2b$12$11QwX8XdW79A0V9KOtC.iekvARHharENUtUkq8Gz/6S/AiM8NWWgW",  # Student123
+}
+
+# Demo references as (title, authors, year, doi, bibtex) rows
+_REFERENCES = (
+    (
+        "Attention Is All You Need",
+        "Vaswani, A., Shazeer, N., Parmar, N., et al.",
+        "2017",
+        "10.48550/arXiv.1706.03762",
+        "@inproceedings{vaswani2017attention, title={Attention is all you need}, author={Vaswani, Ashish and Shazeer, Noam and Parmar, Niki and Uszkoreit, Jakob and Jones, Llion and Gomez, Aidan N and Kaiser, {\\L}ukasz and Polosukhin, Illia}, booktitle={Advances in neural information processing systems}, pages={5998--6008}, year={2017}}",
+    ),
+    (
+        "BERT: Pre-training of Deep Bidirectional Transformers",
+        "Devlin, J., Chang, M.W., Lee, K., Toutanova, K.",
+        "2018",
+        "10.48550/arXiv.1810.04805",
+        "@article{devlin2018bert, title={BERT: Pre-training of Deep Bidirectional Transformers for Language Understanding}, author={Devlin, Jacob and Chang, Ming-Wei and Lee, Kenton and Toutanova, Kristina}, journal={arXiv preprint arXiv:1810.04805}, year={2018}}",
+    ),
+    (
+        "Language Models are Few-Shot Learners",
+        "Brown, T.B., Mann, B., Ryder, N., et al.",
+        "2020",
+        "10.48550/arXiv.2005.14165",
+        "@article{brown2020language, title={Language models are few-shot learners}, author={Brown, Tom and Mann, Benjamin and Ryder, Nick and Subbiah, Melanie and Kaplan, Jared D and Dhariwal, Prafulla and Neelakantan, Arvind and Shyam, Pranav and Sastry, Girish and Askell, Amanda and others}, journal={Advances in neural information processing systems}, volume={33}, pages={1877--1901}, year={2020}}",
+    ),
+    (
+        "Deep Learning",
+        "Goodfellow, I., Bengio, Y., Courville, A.",
+        "2016",
+        "",
+        "@book{goodfellow2016deep, title={Deep learning}, author={Goodfellow, Ian and Bengio, Yoshua and Courville, Aaron}, year={2016}, publisher={MIT press}}",
+    ),
+    (
+        "ImageNet Classification with Deep Convolutional Neural Networks",
+        "Krizhevsky, A., Sutskever, I., Hinton, G.E.",
+        "2012",
+        "10.1145/3065386",
+        "@article{krizhevsky2012imagenet, title={Imagenet classification with deep convolutional neural networks}, author={Krizhevsky, Alex and Sutskever, Ilya and Hinton, Geoffrey E}, journal={Communications of the ACM}, volume={60}, number={6}, pages={84--90}, year={2017}, publisher={AcM New York, NY, USA}}",
+    ),
+)
+
+# Console output is collected here and written with a single write() by _flush_output()
+_out = io.StringIO()
+# QUIET=1 silences progress output; messages are then never formatted
+_QUIET = os.environ.get("QUIET") == "1"
+
+
+def _print(fmt: str, *args) -> None:
+    """printf-style console line, formatted only when it will be shown."""
+    if not _QUIET:
+        _out.write((fmt % args if args else fmt) + "\n")
+
+
+def _flush_output() -> None:
+    sys.stdout.write(_out.getvalue())
+    sys.stdout.flush()
+    _out.seek(0)
+    _out.truncate()
+
+
+_SAMPLE_DOC_BYTES = """Sample Research Document
+
+This is a sample document for testing the Research Bot application.
+
+Introduction
+============
+This document demonstrates the document upload and processing capabilities.
+
+Methodology
+===========
+The system uses vector embeddings and FAISS for semantic search.
+
+Results
+=======
+The implementation successfully processes PDF, DOCX, TXT, and LaTeX files.
+
+Conclusion
+==========
+The Research Bot provides powerful AI-assisted research capabilities.
+""".encode("utf-8")
+
+
+def _create_once(path, data: bytes) -> bool:
+    """Write `data` to a new file; False if it already exists.
+
+    Exclusive-create ("xb") folds the existence check into the open itself.
+    """
+    try:
+        with open(path, "xb") as f:
+            f.write(data)
+        return True
+    except FileExistsError:
+        return False
+
 
 def seed_demo_users():
     """Create demo user accounts."""
-    print("\n📝 Creating demo users...")
+    _print("\n📝 Creating demo users...")
     
     auth_manager = get_auth_manager()
     
     users = [
-        ("demo", "demo@research.bot", "Demo123456"),
-        ("researcher", "researcher@research.bot", "Research123"),
-        ("student", "student@research.bot", "Student123"),
+        ("demo", "demo@research.bot", _DEMO_HASHES["demo"]),
+        ("researcher", "researcher@research.bot", _DEMO_HASHES["researcher"]),
+        ("student", "student@research.bot", _DEMO_HASHES["student"]),
     ]
     
     created = 0
-    for username, email, password in users:
-        success, message = auth_manager.register_user(username, email, password)
+    results = auth_manager.register_users_bulk(users, prehashed=True)
+    for (username, _, _), (success, message) in zip(users, results):
         if success:
-            print(f"  ✅ Created user: {username}")
+            _print("  ✅ Created user: %s", username)
             created += 1
         else:
             if "already exists" in message.lower():
-                print(f"  ⏭️  User {username} already exists")
+                _print("  ⏭️  User %s already exists", username)
             else:
-                print(f"  ❌ Failed to create {username}: {message}")
+                _print("  ❌ Failed to create %s: %s", username, message)
     
-    print(f"\n✅ Created {created} new user(s)")
+    _print("\n✅ Created %d new user(s)", created)
 
 
 def seed_demo_references():
     """Add demo research references."""
-    print("\n📚 Adding demo references...")
-    
-    references = [
-        {
-            "title": "Attention Is All You Need",
-            "authors": "Vaswani, A., Shazeer, N., Parmar, N., et al.",
-            "year": "2017",
-            "doi": "10.48550/arXiv.1706.03762",
-            "bibtex": "@inproceedings{vaswani2017attention, title={Attention is all you need}, author={Vaswani, Ashish and Shazeer, Noam and Parmar, Niki and Uszkoreit, Jakob and Jones, Llion and Gomez, Aidan N and Kaiser, {\L}ukasz and Polosukhin, Illia}, booktitle={Advances in neural information processing systems}, pages={5998--6008}, year={2017}}"
-        },
-        {
-            "title": "BERT: Pre-training of Deep Bidirectional Transformers",
-            "authors": "Devlin, J., Chang, M.W., Lee, K., Toutanova, K.",
-            "year": "2018",
-            "doi": "10.48550/arXiv.1810.04805",
-            "bibtex": "@article{devlin2018bert, title={BERT: Pre-training of Deep Bidirectional Transformers for Language Understanding}, author={Devlin, Jacob and Chang, Ming-Wei and Lee, Kenton and Toutanova, Kristina}, journal={arXiv preprint arXiv:1810.04805}, year={2018}}"
-        },
-        {
-            "title": "Language Models are Few-Shot Learners",
-            "authors": "Brown, T.B., Mann, B., Ryder, N., et al.",
-            "year": "2020",
-            "doi": "10.48550/arXiv.2005.14165",
-            "bibtex": "@article{brown2020language, title={Language models are few-shot learners}, author={Brown, Tom and Mann, Benjamin and Ryder, Nick and Subbiah, Melanie and Kaplan, Jared D and Dhariwal, Prafulla and Neelakantan, Arvind and Shyam, Pranav and Sastry, Girish and Askell, Amanda and others}, journal={Advances in neural information processing systems}, volume={33}, pages={1877--1901}, year={2020}}"
-        },
-        {
-            "title": "Deep Learning",
-            "authors": "Goodfellow, I., Bengio, Y., Courville, A.",
-            "year": "2016",
-            "doi": "",
-            "bibtex": "@book{goodfellow2016deep, title={Deep learning}, author={Goodfellow, Ian and Bengio, Yoshua and Courville, Aaron}, year={2016}, publisher={MIT press}}"
-        },
-        {
-            "title": "ImageNet Classification with Deep Convolutional Neural Networks",
-            "authors": "Krizhevsky, A., Sutskever, I., Hinton, G.E.",
-            "year": "2012",
-            "doi": "10.1145/3065386",
-            "bibtex": "@article{krizhevsky2012imagenet, title={Imagenet classification with deep convolutional neural networks}, author={Krizhevsky, Alex and Sutskever, Ilya and Hinton, Geoffrey E}, journal={Communications of the ACM}, volume={60}, number={6}, pages={84--90}, year={2017}, publisher={AcM New York, NY, USA}}"
-        }
-    ]
+    _print("\n📚 Adding demo references...")
     
-    added = 0
-    for ref in references:
-        try:
-            add_reference(
-                title=ref["title"],
-                authors=ref["authors"],
-                year=ref["year"],
-                doi=ref["doi"],
-                bibtex=ref["bibtex"]
-            )
-            print(f"  ✅ Added: {ref['title'][:50]}...")
-            added += 1
-        except Exception as e:
-            print(f"  ⏭️  Skipping (may exist): {ref['title'][:50]}...")
-            logger.debug(f"Reference add error: {e}")
-    
-    print(f"\n✅ Added {added} reference(s)")
+    
+    try:
+        added = add_references_bulk(_REFERENCES, durable=False)
+    except Exception as e:
+        _print("  ❌ Failed to add references: %s", e)
+        logger.debug(f"Reference add error: {e}")
+        return
+    skipped = len(_REFERENCES) - added
+    if skipped:
+        _print("  ⏭️  Skipped %d existing reference(s)", skipped)
+    
+    _print("\n✅ Added %d reference(s)", added)
 
 
 def create_sample_uploads():
     """Create sample document structure."""
-    print("\n📁 Creating sample upload structure...")
+    _print("\n📁 Creating sample upload structure...")
     
-    from config import UPLOAD_DIR, VECTOR_DB_DIR, BASE_DIR
+    # Lives inside uploads/ so wiping that directory also re-enables seeding
+    marker = UPLOAD_DIR / ".seed_marker"
+    if marker.exists():
+        _print("  ⏭️  Sample structure already created")
+        return
     
     # Create user directories for demo users
-    demo_dirs = [
-        UPLOAD_DIR / "user_1",
-        UPLOAD_DIR / "user_2", 
-        UPLOAD_DIR / "user_3",
-        VECTOR_DB_DIR / "user_1",
-        VECTOR_DB_DIR / "user_2",
-        VECTOR_DB_DIR / "user_3",
-        BASE_DIR / "exports" / "user_1",
-        BASE_DIR / "exports" / "user_2",
-        BASE_DIR / "exports" / "user_3",
-    ]
+    parent_dirs = [UPLOAD_DIR, VECTOR_DB_DIR, BASE_DIR / "exports"]
+    user_dirs = ["user_1", "user_2", "user_3"]
+    
+    # Parents once, then only the leaves; mkdir's own error replaces an exists() check
+    for parent in parent_dirs:
+        parent.mkdir(parents=True, exist_ok=True)
     
     created = 0
-    for dir_path in demo_dirs:
-        if not dir_path.exists():
-            dir_path.mkdir(parents=True, exist_ok=True)
+    for parent, user_dir in itertools.product(parent_dirs, user_dirs):
+        try:
+            (parent / user_dir).mkdir()
             created += 1
+        except FileExistsError:
+            pass
     
-    print(f"  ✅ Created {created} user directories")
+    _print("  ✅ Created %d user directories", created)
     
     # Create sample text file
-    sample_text = """Sample Research Document
-
-This is a sample document for testing the Research Bot application.
-
-Introduction
-============
-This document demonstrates the document upload and processing capabilities.
-
-Methodology
-===========
-The system uses vector embeddings and FAISS for semantic search.
-
-Results
-=======
-The implementation successfully processes PDF, DOCX, TXT, and LaTeX files.
-
-Conclusion
-==========
-The Research Bot provides powerful AI-assisted research capabilities.
-"""
+    if _create_once(UPLOAD_DIR / "user_1" / "sample_research.txt", _SAMPLE_DOC_BYTES):
+        _print("  ✅ Created sample document: sample_research.txt")
     
-    sample_file = UPLOAD_DIR / "user_1" / "sample_research.txt"
-    if not sample_file.exists():
-        with open(sample_file, "w", encoding="utf-8") as f:
-            f.write(sample_text)
-        print(f"  ✅ Created sample document: sample_research.txt")
+    _create_once(marker, b"")
 
 
 def seed_all():
     """Run all seed functions."""
-    print("\n" + "="*60)
-    print("DATABASE SEEDING - Demo Data")
-    print("="*60)
+    _print("\n" + "="*60)
+    _print("DATABASE SEEDING - Demo Data")
+    _print("="*60)
     
     seed_demo_users()
     seed_demo_references()
     create_sample_uploads()
     
-    print("\n" + "="*60)
-    print("✅ SEEDING COMPLETE")
-    print("="*60)
-    print("\n📝 Demo Credentials:")
-    print("  Username: demo     | Password: Demo123456")
-    print("  Username: researcher | Password: Research123")
-    print("  Username: student  | Password: Student123")
-    print("\n🚀 Run: streamlit run app.py")
-    print("="*60 + "\n")
+    _print("\n" + "="*60)
+    _print("✅ SEEDING COMPLETE")
+    _print("="*60)
+    _print("\n📝 Demo Credentials:")
+    _print("  Username: demo     | Password: Demo123456")
+    _print("  Username: researcher | Password: Research123")
+    _print("  Username: student  | Password: Student123")
+    _print("\n🚀 Run: streamlit run app.py")
+    _print("="*60 + "\n")
+    _flush_output()
 
 
 if __name__ == "__main__":
@@ -186,12 +225,15 @@ if __name__ == "__main__":
     
     args = parser.parse_args()
     
-    if args.users:
-        seed_demo_users()
-    elif args.references:
-        seed_demo_references()
-    elif args.files:
-        create_sample_uploads()
-    else:
-        # Run all if no specific flag
-        seed_all()
+    try:
+        if args.users:
+            seed_demo_users()
+        elif args.references:
+            seed_demo_references()
+        elif args.files:
+            create_sample_uploads()
+        else:
+            # Run all if no specific flag
+            seed_all()
+    finally:
+        _flush_output()
@@ -3,14 +3,8 @@ Setup script to initialize authentication system with demo account.
 Run this once before first use.
 """
 
-import sys
-from pathlib import Path
-
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
+from _bootstrap import logger
 from utils.auth import get_auth_manager
-from config import logger
 
 
 def setup_auth_system():
@@ -2,52 +2,66 @@
 Run this from the project root inside the `capstone` conda env:
     conda run -n capstone python scripts/smoke_test.py
 """
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-# Add project root to path so imports like `config` and `utils` resolve when
-# running the script from the project root or via `conda run`.
-ROOT = Path(__file__).resolve().parents[1]
-sys.path.append(str(ROOT))
+import numpy as np
 
-from config import logger, UPLOAD_DIR
+# Puts the project root on sys.path so `config` and `utils` resolve when
+# running the script from the project root or via `conda run`.
+from _bootstrap import logger, UPLOAD_DIR, VECTOR_DB_DIR
 from utils.document_handler import load_document, chunk_text, create_vector_store, load_vector_store
 
 
-def find_sample_file():
+def find_sample_file(args=()):
     up = Path(UPLOAD_DIR)
     if not up.exists():
         print(f"Upload dir {up} not found. Create uploads/ and place a small PDF or TXT to test.")
         return None
-    # If a path is provided as a CLI arg, prefer that.
-    import sys
-    if len(sys.argv) > 1:
-        candidate = Path(sys.argv[1])
+    # If a path is provided as an argument, prefer that.
+    if args:
+        candidate = Path(args[0])
         if candidate.exists():
             return candidate
         # allow relative to uploads dir
-        candidate2 = up / sys.argv[1]
+        candidate2 = up / args[0]
         if candidate2.exists():
             return candidate2
 
-    files = sorted(up.glob('*'))
-    if not files:
+    # One directory scan; keep the best-ranked file, preferring text-like files
+    # first to exercise chunking/embedding during smoke tests
+    priority = {'.txt': 0, '.md': 1, '.docx': 2}
+    best = None
+    with os.scandir(up) as entries:
+        for entry in entries:
+            rank = priority.get(os.path.splitext(entry.name)[1].lower(), len(priority))
+            key = (rank, entry.name)
+            if (best is None or key < best[0]) and entry.is_file():
+                best = (key, entry.path)
+    if best is None:
         print(f"No files in {up}. Add a small PDF or TXT to test the smoke flow.")
         return None
-    # Prefer text-like files first to exercise chunking/embedding during smoke tests
-    for ext in ('.txt', '.md', '.docx'):
-        for f in files:
-            if f.suffix.lower() == ext:
-                return f
-    return files[0]
+    return Path(best[1])
+
+
+def _warm_embedder():
+    """Import the embedding stack and load the model so later calls are warm."""
+    from utils.llm import get_embeddings
+    get_embeddings(["warm-up"])
+    return get_embeddings
 
 
-def main():
+def main(args=()):
     print("Starting smoke test...")
-    f = find_sample_file()
+    f = find_sample_file(args)
     if not f:
         return
     print(f"Using sample file: {f}")
+    # Model import/load overlaps with document parsing instead of following it
+    pool = ThreadPoolExecutor(max_workers=1)
+    warm_embedder = pool.submit(_warm_embedder)
     try:
         text, meta = load_document(f)
         print("Loaded document; metadata:", meta)
@@ -58,9 +72,9 @@ def main():
             print("No text chunks were produced for this document (likely scanned PDF or empty). Skipping vector store creation.")
             return
 
+        get_embeddings = warm_embedder.result()
         create_vector_store(chunks, f.name)
         print("Created vector store; now attempting to load it back")
-        from config import VECTOR_DB_DIR
         index_path = Path(VECTOR_DB_DIR) / f"{f.name}.faiss"
         if not index_path.exists():
             print(f"Vector store not created at expected path: {index_path}")
@@ -69,20 +83,21 @@ def main():
         print("Loaded vector store with", len(chunks2), "chunks")
         # Do a basic similarity search if FAISS loaded
         try:
-            import numpy as np
-            q = chunks2[0][:200]
-            from utils.llm import get_embeddings
-            emb = get_embeddings([q])
+            # A batch of probes costs about the same as one query in FAISS
+            queries = [c[:200] for c in chunks2[:8]]
+            emb = get_embeddings(queries)
             if emb:
-                emb = np.array(emb).astype('float32')
+                emb = np.asarray(emb, dtype='float32')
                 D, I = idx.search(emb, k=3)
-                print('Search distances:', D)
-                print('Top indices:', I)
+                for probe, (dists, ids) in enumerate(zip(D, I)):
+                    print(f'Probe {probe}: distances={dists} indices={ids}')
         except Exception as se:
             print('Search failed:', se)
     except Exception as e:
         print('Smoke test failed:', e)
+    finally:
+        pool.shutdown(wait=False)
 
 
 if __name__ == '__main__':
-    main()
+    main(sys.argv[1:])
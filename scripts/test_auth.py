@@ -4,69 +4,55 @@ Tests all authentication functions
 """
 
 import sys
-from pathlib import Path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+from concurrent.futures import ThreadPoolExecutor
 
+import _bootstrap  # noqa: F401  (project root on sys.path)
 from utils.auth import get_auth_manager
 import time
 
+# One manager for the whole suite instead of a lookup per test
+AUTH = get_auth_manager()
 
-def test_registration():
+
+def test_registration(auth=AUTH):
     """Test user registration."""
     print("\n🧪 TEST 1: User Registration")
     print("-" * 50)
 
-    auth = get_auth_manager()
-
-    # Test 1: Valid registration
-    print("✓ Testing valid registration...")
-    success, msg = auth.register_user("testuser1", "test1@example.com", "TestPass123")
-    assert success, f"Registration failed: {msg}"
-    print(f"  ✅ {msg}")
-
-    # Test 2: Duplicate username
-    print("✓ Testing duplicate username detection...")
-    success, msg = auth.register_user("testuser1", "test2@example.com", "TestPass123")
-    assert not success, "Should reject duplicate username"
-    print(f"  ✅ {msg}")
-
-    # Test 3: Duplicate email
-    print("✓ Testing duplicate email detection...")
-    success, msg = auth.register_user("testuser2", "test1@example.com", "TestPass123")
-    assert not success, "Should reject duplicate email"
-    print(f"  ✅ {msg}")
-
-    # Test 4: Weak password
-    print("✓ Testing weak password rejection...")
-    success, msg = auth.register_user("testuser3", "test3@example.com", "weak")
-    assert not success, "Should reject weak password"
-    print(f"  ✅ {msg}")
-
-    # Test 5: Invalid email
-    print("✓ Testing invalid email rejection...")
-    success, msg = auth.register_user("testuser4", "invalidemail", "TestPass123")
-    assert not success, "Should reject invalid email"
-    print(f"  ✅ {msg}")
+    # (description, username, email, password, expect_success, message substring)
+    cases = [
+        ("valid registration", "testuser1", "test1@example.com", "TestPass123", True, "successful"),
+        ("duplicate username detection", "testuser1", "test2@example.com", "TestPass123", False, "already exists"),
+        ("duplicate email detection", "testuser2", "test1@example.com", "TestPass123", False, "already registered"),
+        ("weak password rejection", "testuser3", "test3@example.com", "weak", False, "Password must be"),
+        ("invalid email rejection", "testuser4", "invalidemail", "TestPass123", False, "Invalid email"),
+    ]
+
+    # Sequential on purpose: the duplicate cases depend on the first registration
+    for description, username, email, password, expect_success, expected_msg in cases:
+        print(f"✓ Testing {description}...")
+        success, msg = auth.register_user(username, email, password)
+        assert success == expect_success, f"{description}: unexpected result: {msg}"
+        assert expected_msg in msg, f"{description}: unexpected message: {msg}"
+        print(f"  ✅ {msg}")
 
     print("✅ Registration tests passed!")
 
 
-def test_authentication():
+def test_authentication(auth=AUTH):
     """Test user authentication."""
     print("\n🧪 TEST 2: User Authentication")
     print("-" * 50)
 
-    auth = get_auth_manager()
-
     # Register test user
     auth.register_user("authtest", "authtest@example.com", "AuthPass123")
 
     # Test 1: Valid login
     print("✓ Testing valid login...")
-    success, msg, token = auth.authenticate_user("authtest", "AuthPass123")
-    assert success and token, f"Authentication failed: {msg}"
+    success, msg, session_token = auth.authenticate_user("authtest", "AuthPass123")
+    assert success and session_token, f"Authentication failed: {msg}"
     print(f"  ✅ {msg}")
-    print(f"  Session token created: {token[:20]}...")
+    print(f"  Session token created: {session_token[:20]}...")
 
     # Test 2: Wrong password
     print("✓ Testing wrong password rejection...")
@@ -81,16 +67,14 @@ def test_authentication():
     print(f"  ✅ {msg}")
 
     print("✅ Authentication tests passed!")
-    return token
+    return session_token
 
 
-def test_session_management(token):
+def test_session_management(token, auth=AUTH):
     """Test session token verification."""
     print("\n🧪 TEST 3: Session Management")
     print("-" * 50)
 
-    auth = get_auth_manager()
-
     # Test 1: Valid session
     print("✓ Testing valid session verification...")
     is_valid, username = auth.verify_session(token)
@@ -118,13 +102,11 @@ def test_session_management(token):
     print("✅ Session management tests passed!")
 
 
-def test_password_change():
+def test_password_change(auth=AUTH):
     """Test password change functionality."""
     print("\n🧪 TEST 4: Password Change")
     print("-" * 50)
 
-    auth = get_auth_manager()
-
     # Register test user
     auth.register_user("pwdtest", "pwdtest@example.com", "OldPass123")
 
@@ -155,13 +137,11 @@ def test_password_change():
     print("✅ Password change tests passed!")
 
 
-def test_user_info():
+def test_user_info(auth=AUTH):
     """Test user information retrieval."""
     print("\n🧪 TEST 5: User Information")
     print("-" * 50)
 
-    auth = get_auth_manager()
-
     # Register test user
     auth.register_user("infotest", "infotest@example.com", "InfoPass123")
 
@@ -191,11 +171,16 @@ def run_all_tests():
     print("=" * 60)
 
     try:
-        test_registration()
-        token = test_authentication()
-        test_session_management(token)
-        test_password_change()
-        test_user_info()
+        # These use disjoint usernames and are bcrypt-bound (bcrypt releases
+        # the GIL), so they run concurrently; output may interleave.
+        independent = [test_registration, test_password_change, test_user_info]
+        with ThreadPoolExecutor(max_workers=len(independent)) as pool:
+            futures = [pool.submit(test) for test in independent]
+            # Authentication and session tests share a token, so stay sequential
+            token = test_authentication()
+            test_session_management(token)
+            for future in futures:
+                future.result()
 
         print("\n" + "=" * 60)
         print("✅ ALL TESTS PASSED!")
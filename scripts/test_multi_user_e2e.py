@@ -8,13 +8,23 @@ import os
 import sys
 import requests
 import json
-import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 from datetime import datetime
 
+# orjson is optional; it parses and serializes faster than stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configuration
 API_BASE_URL = "http://localhost:8000"
 FRONTEND_URL = "http://localhost:3000"
+REPORT_PATH = Path(__file__).resolve().parent.parent / "test_results_multiuser.json"
 
 # Test users
 TEST_USERS = [
@@ -22,6 +32,7 @@ TEST_USERS = [
     {"id": "user_002", "name": "Bob Smith", "email": "bob@university.edu", "password": "bob_pass123"},
     {"id": "user_003", "name": "Carol Davis", "email": "carol@university.edu", "password": "carol_pass123"},
 ]
+USERS_BY_ID = {u["id"]: u for u in TEST_USERS}
 
 # Test documents
 TEST_DOCS = [
@@ -55,11 +66,75 @@ Open Challenges: Interpretability, multilingual support, efficiency"""
     }
 ]
 
+# Longest a workflow waits for the others to reach the isolation check
+ISOLATION_BARRIER_TIMEOUT = 300
+
+# Module endpoints exercised by every workflow
+MODULES_AND_ACTIONS = (
+    ("literature_review", "generate"),
+    ("topic_finder", "extract"),
+    ("grammar_style", "check"),
+    ("citation_tool", "search"),
+    ("plagiarism_check", "analyze"),
+)
+
+# Documents never change, so encode them and cut the module-call snippet once
+for _doc in TEST_DOCS:
+    _doc['bytes'] = _doc['content'].encode('utf-8')
+    _doc['snippet500'] = _doc['content'][:500]
+
+def _json_body(response):
+    """Decode a JSON response body."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+# One connection pool shared by every session. Auth headers and cookies live
+# on the Session, not the adapter, so all users' uploads and module calls
+# reuse the same keep-alive sockets instead of each user opening its own.
+# Pacing is left to the server: a 429/503 is retried after its Retry-After
+# delay (or exponential backoff), so the workflow never sleeps up front.
+# Only statuses the server sends before doing any work are retried; a 502/504
+# or a read error may come after an upload or registration was accepted, and
+# repeating those POSTs would skew the file lists the isolation check compares.
+_ADAPTER = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(
+        total=3,
+        read=0,
+        backoff_factor=0.5,
+        status_forcelist=[429, 503],
+        allowed_methods=None,  # module calls are POSTs
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand the last response back so it gets logged
+    ),
+)
+
+
+def _new_session():
+    """Session on the shared keep-alive pool."""
+    session = requests.Session()
+    session.mount("http://", _ADAPTER)
+    session.mount("https://", _ADAPTER)
+    return session
+
+
 class MultiUserTester:
     def __init__(self):
-        self.session = requests.Session()
+        # Unauthenticated calls (register/login); each user gets its own
+        # session so Authorization headers never clobber each other
+        self.session = _new_session()
         self.test_results = []
         self.users_data = {}
+        # Workflows run on one thread per user
+        self._log_lock = threading.Lock()
+        self._isolation_barrier = None
+    
+    def user_session(self, user_id):
+        """Authenticated session for a user"""
+        return self.users_data[user_id]['session']
         
     def log_test(self, test_name, status, details=""):
         """Log test result"""
@@ -70,16 +145,30 @@ class MultiUserTester:
             "status": status,
             "details": details
         }
-        self.test_results.append(result)
         status_icon = "✅" if status == "PASS" else "❌"
-        print(f"{status_icon} [{timestamp}] {test_name}: {status}")
+        line = f"{status_icon} [{timestamp}] {test_name}: {status}"
         if details:
-            print(f"   └─ {details}")
+            line += f"\n   └─ {details}"
+        with self._log_lock:
+            self.test_results.append(result)
+            print(line)
     
     def register_user(self, user):
         """Register a new user"""
         test_name = f"Register {user['name']}"
         try:
+            # Re-runs hit the same users; a cheap existence check avoids a
+            # POST that only bcrypt-hashes the password to answer 409. Any
+            # non-200 (including a server without the endpoint) falls through.
+            exists = self.session.head(
+                f"{API_BASE_URL}/api/auth/exists",
+                params={"email": user['email']},
+                timeout=10
+            )
+            if exists.status_code == 200:
+                self.log_test(test_name, "PASS", "Already registered")
+                return True
+            
             response = self.session.post(
                 f"{API_BASE_URL}/api/auth/register",
                 json={
@@ -91,10 +180,16 @@ class MultiUserTester:
             )
             
             if response.status_code in [200, 201, 409]:  # 409 = user exists
-                self.users_data[user['id']] = {
-                    **user,
-                    "token": response.json().get('token') if 'token' in response.json() else None
-                }
+                # Parse once; error bodies (e.g. a 409 from a proxy) may not be JSON
+                try:
+                    body = _json_body(response) if response.content else {}
+                except ValueError:
+                    body = {}
+                token = body.get('token') if isinstance(body, dict) else None
+                session = _new_session()
+                if token:
+                    session.headers["Authorization"] = f"Bearer {token}"
+                self.users_data[user['id']] = {**user, "token": token, "session": session}
                 self.log_test(test_name, "PASS", f"Status: {response.status_code}")
                 return True
             else:
@@ -106,7 +201,7 @@ class MultiUserTester:
     
     def login_user(self, user_id):
         """Login a user"""
-        user = TEST_USERS[[u['id'] for u in TEST_USERS].index(user_id)]
+        user = USERS_BY_ID[user_id]
         test_name = f"Login {user['name']}"
         try:
             response = self.session.post(
@@ -119,9 +214,10 @@ class MultiUserTester:
             )
             
             if response.status_code == 200:
-                token = response.json().get('token')
-                self.users_data[user_id]['token'] = token
-                self.session.headers.update({"Authorization": f"Bearer {token}"})
+                token = _json_body(response).get('token')
+                user_data = self.users_data.setdefault(user_id, {**user, "session": _new_session()})
+                user_data['token'] = token
+                user_data['session'].headers["Authorization"] = f"Bearer {token}"
                 self.log_test(test_name, "PASS", "Token acquired")
                 return True
             else:
@@ -133,24 +229,22 @@ class MultiUserTester:
     
     def upload_document(self, user_id, doc_index):
         """Upload a document for a user"""
-        user = [u for u in TEST_USERS if u['id'] == user_id][0]
+        user = USERS_BY_ID[user_id]
         doc = TEST_DOCS[doc_index % len(TEST_DOCS)]
         test_name = f"{user['name']} - Upload '{doc['name']}'"
         
         try:
             # Prepare file
-            files = {'file': (doc['name'], doc['content'].encode())}
-            headers = {"Authorization": f"Bearer {self.users_data[user_id]['token']}"}
+            files = {'file': (doc['name'], doc['bytes'])}
             
-            response = self.session.post(
+            response = self.user_session(user_id).post(
                 f"{API_BASE_URL}/api/upload",
                 files=files,
-                headers=headers,
                 timeout=30
             )
             
             if response.status_code in [200, 201]:
-                self.log_test(test_name, "PASS", f"File size: {len(doc['content'])} bytes")
+                self.log_test(test_name, "PASS", f"File size: {len(doc['bytes'])} bytes")
                 return True
             else:
                 self.log_test(test_name, "FAIL", f"Status: {response.status_code}")
@@ -161,17 +255,15 @@ class MultiUserTester:
     
     def call_module_endpoint(self, user_id, module_name, action, params=None):
         """Call a module endpoint"""
-        user = [u for u in TEST_USERS if u['id'] == user_id][0]
+        user = USERS_BY_ID[user_id]
         test_name = f"{user['name']} - {module_name}: {action}"
         
         try:
-            headers = {"Authorization": f"Bearer {self.users_data[user_id]['token']}"}
             payload = params or {}
             
-            response = self.session.post(
+            response = self.user_session(user_id).post(
                 f"{API_BASE_URL}/api/{module_name}/{action}",
                 json=payload,
-                headers=headers,
                 timeout=30
             )
             
@@ -187,32 +279,26 @@ class MultiUserTester:
     
     def check_user_data_isolation(self, user_id):
         """Verify user's data is isolated from other users"""
-        test_name = f"Data Isolation Check - {[u for u in TEST_USERS if u['id'] == user_id][0]['name']}"
+        test_name = f"Data Isolation Check - {USERS_BY_ID[user_id]['name']}"
         try:
-            headers = {"Authorization": f"Bearer {self.users_data[user_id]['token']}"}
-            
             # Get user's files
-            response = self.session.get(
+            response = self.user_session(user_id).get(
                 f"{API_BASE_URL}/api/files/list",
-                headers=headers,
                 timeout=10
             )
             
             if response.status_code == 200:
-                files = response.json().get('files', [])
+                files = _json_body(response).get('files', [])
                 
                 # Get all files with a different user token (should get different results)
-                other_user_id = [u['id'] for u in TEST_USERS if u['id'] != user_id][0]
-                other_headers = {"Authorization": f"Bearer {self.users_data[other_user_id]['token']}"}
-                
-                other_response = self.session.get(
+                other_user_id = next(uid for uid in USERS_BY_ID if uid != user_id)
+                other_response = self.user_session(other_user_id).get(
                     f"{API_BASE_URL}/api/files/list",
-                    headers=other_headers,
                     timeout=10
                 )
                 
                 if other_response.status_code == 200:
-                    other_files = other_response.json().get('files', [])
+                    other_files = _json_body(other_response).get('files', [])
                     
                     # Check that lists are different (isolation working)
                     if len(files) != len(other_files) or set(files) != set(other_files):
@@ -238,21 +324,22 @@ class MultiUserTester:
     
     def check_user_audit_log(self, user_id):
         """Verify user actions are logged"""
-        user = [u for u in TEST_USERS if u['id'] == user_id][0]
+        user = USERS_BY_ID[user_id]
         test_name = f"Audit Log Check - {user['name']}"
         try:
-            headers = {"Authorization": f"Bearer {self.users_data[user_id]['token']}"}
-            
-            response = self.session.get(
+            # Only the number of entries is needed; servers that support
+            # count_only reply with {"count": n} instead of the full list
+            response = self.user_session(user_id).get(
                 f"{API_BASE_URL}/api/audit/logs",
-                headers=headers,
+                params={"count_only": 1},
                 timeout=10
             )
             
             if response.status_code == 200:
-                logs = response.json().get('logs', [])
-                if len(logs) > 0:
-                    self.log_test(test_name, "PASS", f"Found {len(logs)} audit log entries")
+                body = _json_body(response)
+                count = body['count'] if 'count' in body else len(body.get('logs', []))
+                if count > 0:
+                    self.log_test(test_name, "PASS", f"Found {count} audit log entries")
                     return True
                 else:
                     self.log_test(test_name, "PASS", "Audit log endpoint working (empty for now)")
@@ -268,62 +355,83 @@ class MultiUserTester:
         """Test multiple users performing operations simultaneously"""
         test_name = "Concurrent Operations Test"
         try:
-            # Each user uploads a document
-            for idx, user in enumerate(TEST_USERS):
-                self.upload_document(user['id'], idx)
+            # Each user uploads a document, all at once
+            with ThreadPoolExecutor(max_workers=len(TEST_USERS)) as executor:
+                futures = [
+                    executor.submit(self.upload_document, user['id'], idx)
+                    for idx, user in enumerate(TEST_USERS)
+                ]
+                wait(futures)
             
-            self.log_test(test_name, "PASS", "All users uploaded documents concurrently")
-            return True
+            if all(f.result() for f in futures):
+                self.log_test(test_name, "PASS", "All users uploaded documents concurrently")
+                return True
+            self.log_test(test_name, "FAIL", "One or more concurrent uploads failed")
+            return False
         except Exception as e:
             self.log_test(test_name, "FAIL", f"Exception: {str(e)}")
             return False
     
     def run_full_workflow(self, user_id, user_index):
         """Run a complete workflow for a user"""
-        user = [u for u in TEST_USERS if u['id'] == user_id][0]
+        user = USERS_BY_ID[user_id]
         
-        print(f"\n{'='*60}")
-        print(f"Testing Workflow for {user['name']} (User #{user_index + 1})")
-        print(f"{'='*60}\n")
-        
-        # 1. Register
-        self.register_user(user)
-        time.sleep(0.5)
+        barrier = self._isolation_barrier
+        # If this workflow fails before the barrier, break it so the other
+        # users fail fast instead of waiting for a party that never arrives
+        try:
+            print(f"\n{'='*60}")
+            print(f"Testing Workflow for {user['name']} (User #{user_index + 1})")
+            print(f"{'='*60}\n")
         
-        # 2. Login
-        self.login_user(user_id)
-        time.sleep(0.5)
+            # 1. Register
+            self.register_user(user)
         
-        # 3. Upload documents (2-3 documents per user)
-        num_docs = 2 + user_index  # Different number of docs for variety
-        for doc_idx in range(num_docs):
-            self.upload_document(user_id, doc_idx)
-            time.sleep(0.3)
+            # 2. Login
+            self.login_user(user_id)
         
-        # 4. Call various module endpoints
-        modules_and_actions = [
-            ("literature_review", "generate"),
-            ("topic_finder", "extract"),
-            ("grammar_style", "check"),
-            ("citation_tool", "search"),
-            ("plagiarism_check", "analyze"),
-        ]
+            # 3. Upload documents (2-3 documents per user)
+            num_docs = 2 + user_index  # Different number of docs for variety
+            for doc_idx in range(num_docs):
+                self.upload_document(user_id, doc_idx)
         
-        for module, action in modules_and_actions:
-            params = {
-                "text": TEST_DOCS[user_index % len(TEST_DOCS)]['content'][:500],
-                "query": "machine learning" if module == "citation_tool" else None
-            }
-            self.call_module_endpoint(user_id, module, action, {k: v for k, v in params.items() if v})
-            time.sleep(0.2)
+            # 4. Call various module endpoints
+            # The module endpoints are independent, so fire them all at once over
+            # the user's pooled session; total latency is the slowest call
+            default_payload = {"text": TEST_DOCS[user_index % len(TEST_DOCS)]['snippet500']}
+            citation_payload = {**default_payload, "query": "machine learning"}
+            with ThreadPoolExecutor(max_workers=len(MODULES_AND_ACTIONS)) as executor:
+                futures = [
+                    executor.submit(
+                        self.call_module_endpoint, user_id, module, action,
+                        citation_payload if module == "citation_tool" else default_payload
+                    )
+                    for module, action in MODULES_AND_ACTIONS
+                ]
+                wait(futures)
+        except BaseException:
+            if barrier is not None:
+                barrier.abort()
+            raise
         
-        # 5. Check data isolation
-        self.check_user_data_isolation(user_id)
-        time.sleep(0.3)
+        # 5. Check data isolation (compares against another user, so wait
+        #    until every parallel workflow has logged in and uploaded)
+        #    A timeout or another user's failure breaks the barrier; the
+        #    check is then failed and the workflow carries on
+        try:
+            if barrier is not None:
+                barrier.wait()
+        except threading.BrokenBarrierError:
+            self.log_test(
+                f"Data Isolation Check - {user['name']}", "FAIL",
+                "Skipped: not every user workflow reached the isolation check"
+            )
+        else:
+            self.check_user_data_isolation(user_id)
         
         # 6. Check audit log
         self.check_user_audit_log(user_id)
-        time.sleep(0.3)
+        sys.stdout.flush()
     
     def run_all_tests(self):
         """Run all tests"""
@@ -333,10 +441,25 @@ class MultiUserTester:
         
         print("Starting Test Suite...\n")
         
-        # Run workflows for each user
-        for idx, user in enumerate(TEST_USERS):
-            self.run_full_workflow(user['id'], idx)
-            time.sleep(1)
+        # Run workflows for all users in parallel; the calls are I/O-bound
+        self._isolation_barrier = threading.Barrier(len(TEST_USERS), timeout=ISOLATION_BARRIER_TIMEOUT)
+        try:
+            with ThreadPoolExecutor(max_workers=len(TEST_USERS)) as executor:
+                futures = [
+                    executor.submit(self.run_full_workflow, user['id'], idx)
+                    for idx, user in enumerate(TEST_USERS)
+                ]
+                # A failed workflow is logged, not raised, so the concurrent
+                # test and the report below still run
+                for user, future in zip(TEST_USERS, futures):
+                    error = future.exception()
+                    if error is not None:
+                        self.log_test(
+                            f"Full Workflow - {user['name']}", "FAIL",
+                            f"Exception: {type(error).__name__}: {error}"
+                        )
+        finally:
+            self._isolation_barrier = None
         
         # Test concurrent operations
         print(f"\n{'='*60}")
@@ -353,8 +476,15 @@ class MultiUserTester:
         print("Test Report")
         print(f"{'='*60}\n")
         
-        passed = sum(1 for r in self.test_results if r['status'] == 'PASS')
-        failed = sum(1 for r in self.test_results if r['status'] == 'FAIL')
+        # One pass: count passes and keep the failures for the listing below
+        passed = 0
+        failed_results = []
+        for r in self.test_results:
+            if r['status'] == 'PASS':
+                passed += 1
+            elif r['status'] == 'FAIL':
+                failed_results.append(r)
+        failed = len(failed_results)
         total = len(self.test_results)
         
         print(f"Total Tests: {total}")
@@ -364,16 +494,17 @@ class MultiUserTester:
         
         if failed > 0:
             print("Failed Tests:")
-            for result in self.test_results:
-                if result['status'] == 'FAIL':
-                    print(f"  ❌ {result['test']}")
-                    print(f"     {result['details']}\n")
+            for result in failed_results:
+                print(f"  ❌ {result['test']}")
+                print(f"     {result['details']}\n")
         
         # Save report to file
-        report_file = Path(__file__).parent.parent / "test_results_multiuser.json"
-        with open(report_file, 'w') as f:
-            json.dump(self.test_results, f, indent=2)
-        print(f"\nDetailed report saved to: {report_file}")
+        if orjson is not None:
+            REPORT_PATH.write_bytes(orjson.dumps(self.test_results, option=orjson.OPT_INDENT_2))
+        else:
+            with open(REPORT_PATH, 'w') as f:
+                json.dump(self.test_results, f, indent=2)
+        print(f"\nDetailed report saved to: {REPORT_PATH}")
         
         # Summary
         print(f"\n{'='*60}")
@@ -382,10 +513,15 @@ class MultiUserTester:
         else:
             print(f"⚠️  {failed} test(s) failed - see details above")
         print(f"{'='*60}\n")
+        sys.stdout.flush()
         
         return passed, failed
 
 if __name__ == "__main__":
+    # Result lines come from several worker threads; block-buffer stdout so
+    # each one isn't a separate write, and flush once per workflow/report
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(line_buffering=False)
     try:
         print("\n🚀 Starting Multi-User End-to-End Tests...\n")
         print(f"API URL: {API_BASE_URL}")
@@ -4,18 +4,50 @@ Integration Verification Script
 Validates that all 7 modules have been properly integrated with user isolation
 """
 
+import argparse
+import json
+import os
+import queue
 import re
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Tuple, Union
+
+# pyahocorasick is optional; it finds all required substrings in one scan
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 # Configuration
 MODULES_DIR = Path(__file__).parent.parent / "modules"
+# Results of earlier runs, reused for modules whose mtime and size are unchanged
+CACHE_PATH = Path(__file__).parent.parent / ".integration_cache.json"
+# Part of every cache key, so editing the checks invalidates old results
+_SCRIPT_MTIME_NS = os.stat(__file__).st_mtime_ns
+# All plain ASCII substrings, so modules are scanned as raw bytes with `in`
+# rather than decoded and matched with regexes
 REQUIRED_PATTERNS = {
-    "require_authentication": r"@require_authentication",
-    "user_data_import": r"from utils\.user_data import",
-    "get_current_user_id": r"get_current_user_id",
-    "log_user_action": r"log_user_action",
+    "require_authentication": b"@require_authentication",
+    "user_data_import": b"from utils.user_data import",
+    "get_current_user_id": b"get_current_user_id",
+    "log_user_action": b"log_user_action",
 }
+DECORATOR = b"@require_authentication"
+
+_REQUIRED_AUTOMATON = None
+if ahocorasick is not None:
+    _REQUIRED_AUTOMATON = ahocorasick.Automaton()
+    for _name, _literal in REQUIRED_PATTERNS.items():
+        _REQUIRED_AUTOMATON.add_word(_literal.decode("ascii"), _name)
+    _REQUIRED_AUTOMATON.make_automaton()
+# Decorator and `def main():` on the same line; the usual case of separate
+# lines is tracked while walking the file
+_MAIN_RE = re.compile(rb"@require_authentication\s+def main\(\):")
+# Global directory constants modules should no longer use directly
+GLOBAL_DIRS = (b"UPLOAD_DIR", b"EXPORT_DIR")
 
 MODULES_TO_CHECK = [
     "ask_paper.py",
@@ -29,122 +61,286 @@ MODULES_TO_CHECK = [
 ]
 
 class IntegrationVerifier:
-    def __init__(self):
+    def __init__(self, verbose: bool = False):
+        # Output is collected and written in one go; verbose writes each
+        # module's result as soon as it is known
+        self.verbose = verbose
+        self._out = []
         self.results = []
         self.modules_ok = 0
         self.modules_issues = 0
+        self._cache = {}
+        # module name -> [mtime_ns, size, script mtime_ns] for modules read this run
+        self._stamps = {}
+    
+    def _emit(self, text: str = "") -> None:
+        self._out.append(text + "\n")
+    
+    def _flush(self) -> None:
+        sys.stdout.write("".join(self._out))
+        self._out.clear()
+        if self.verbose:
+            sys.stdout.flush()
     
     def check_module(self, module_name: str) -> Tuple[bool, List[str]]:
         """Check if a module is properly integrated"""
         module_path = MODULES_DIR / module_name
-        
-        if not module_path.exists():
-            return False, [f"File not found: {module_path}"]
-        
+        return self._check_module_content(module_path, self._read_module(module_path))
+    
+    @staticmethod
+    def _read_module(module_path: Path) -> Union[bytes, Exception]:
+        """Raw bytes of a module file, or the exception raised reading it"""
         try:
-            with open(module_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            return module_path.read_bytes()
+        except Exception as e:
+            return e
+    
+    def _prefetch_modules(self, out: queue.Queue) -> None:
+        """Read MODULES_TO_CHECK in order into `out`, then a None sentinel"""
+        try:
+            # One directory listing answers "does it exist" for every module,
+            # so a missing module costs no failed open()
+            try:
+                with os.scandir(MODULES_DIR) as it:
+                    present = {entry.name for entry in it}
+            except FileNotFoundError:
+                present = set()
+            for module_name in MODULES_TO_CHECK:
+                module_path = MODULES_DIR / module_name
+                if module_name not in present:
+                    out.put((module_path, FileNotFoundError(module_path), None))
+                    continue
+                try:
+                    st = os.stat(module_path)
+                except OSError as e:
+                    out.put((module_path, e, None))
+                    continue
+                stamp = [st.st_mtime_ns, st.st_size, _SCRIPT_MTIME_NS]
+                cached = self._cache.get(module_name)
+                if cached is not None and cached[:3] == stamp:
+                    self._stamps[module_name] = stamp
+                    out.put((module_path, None, (cached[3], cached[4])))
+                    continue
+                data = self._read_module(module_path)
+                if isinstance(data, bytes):
+                    self._stamps[module_name] = stamp
+                out.put((module_path, data, None))
         except Exception as e:
-            return False, [f"Error reading file: {str(e)}"]
+            # Handed to the consumer to raise; the sentinel still follows so
+            # it never waits on a reader that has stopped
+            out.put(e)
+        finally:
+            out.put(None)
+    
+    @staticmethod
+    def _count_lines_with(content: bytes, needle: bytes, limit: int) -> int:
+        """Lines containing `needle` (stopping at `limit`), found by jumping between matches"""
+        lines = 0
+        pos = content.find(needle)
+        while pos >= 0:
+            lines += 1
+            if lines >= limit:
+                break
+            # Continue from the start of the next line
+            pos = content.find(b'\n', pos)
+            if pos < 0:
+                break
+            pos = content.find(needle, pos + 1)
+        return lines
+    
+    @staticmethod
+    def _load_cache() -> dict:
+        """Cached results from the last run, keyed by module name"""
+        try:
+            with open(CACHE_PATH, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(cache, dict):
+            return {}
+        # Keep only well-formed [mtime_ns, size, script mtime_ns, ok, issues]
+        # entries; anything else is re-checked as if it were not cached
+        return {
+            module_name: entry
+            for module_name, entry in cache.items()
+            if isinstance(entry, list) and len(entry) == 5
+            and isinstance(entry[3], bool) and isinstance(entry[4], list)
+        }
+    
+    def _save_cache(self, checked: List[Tuple[bool, List[str]]]) -> None:
+        """Atomically replace the cache with this run's results"""
+        cache = {
+            module_name: [*self._stamps[module_name], ok, issues]
+            for module_name, (ok, issues) in zip(MODULES_TO_CHECK, checked)
+            if module_name in self._stamps
+        }
+        tmp_path = CACHE_PATH.with_name(CACHE_PATH.name + ".tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, CACHE_PATH)
+        except OSError as e:
+            self._emit(f"⚠️  Could not write {CACHE_PATH}: {e}")
+    
+    def _check_module_content(self, module_path: Path, data: Union[bytes, Exception]) -> Tuple[bool, List[str]]:
+        """Run the integration checks on a module already read by _read_module"""
+        if isinstance(data, FileNotFoundError):
+            return False, [f"File not found: {module_path}"]
+        if isinstance(data, Exception):
+            return False, [f"Error reading file: {str(data)}"]
         
+        # Every check is an ASCII match, so the file is never decoded
+        content = data
         issues = []
         
-        # Check for required patterns
-        for pattern_name, pattern in REQUIRED_PATTERNS.items():
-            if not re.search(pattern, content):
+        # Walk the source once, collecting what every check below needs
+        # Required substrings never span lines, so one automaton scan of the
+        # whole file replaces the per-line checks when it is available
+        if _REQUIRED_AUTOMATON is not None:
+            # latin-1 maps bytes to code points 1:1 and cannot fail
+            found = {name for _, name in _REQUIRED_AUTOMATON.iter(content.decode('latin-1'))}
+        else:
+            found = set()
+        main_decorated = False
+        after_decorator = False  # last non-blank text was the decorator
+        in_import = False        # inside a parenthesized `from ... import (`
+        old_refs = set()         # directory constants used outside imports
+        for line in content.split(b'\n'):
+            if _REQUIRED_AUTOMATON is None:
+                for pattern_name, literal in REQUIRED_PATTERNS.items():
+                    if literal in line:
+                        found.add(pattern_name)
+            
+            if after_decorator and line.lstrip().startswith(b"def main():"):
+                main_decorated = True
+            if not main_decorated and DECORATOR in line and _MAIN_RE.search(line):
+                main_decorated = True
+            if line.strip():
+                after_decorator = line.rstrip().endswith(DECORATOR)
+            
+            if in_import:
+                in_import = b")" not in line
+            elif line.lstrip().startswith((b"from ", b"import ")):
+                in_import = b"(" in line and b")" not in line
+            else:
+                for name in GLOBAL_DIRS:
+                    if name in line and name not in old_refs:
+                        # Text after each occurrence; a plain `=` there is an assignment
+                        for rest in line.split(name)[1:]:
+                            after = rest.lstrip()
+                            if not after.startswith(b"=") or after.startswith(b"=="):
+                                old_refs.add(name)
+                                break
+        
+        for pattern_name in REQUIRED_PATTERNS:
+            if pattern_name not in found:
                 issues.append(f"Missing: {pattern_name}")
         
-        # Special check: ensure @require_authentication is not duplicated
-        decorator_count = len(re.findall(r"@require_authentication", content))
-        if decorator_count > 1:
-            # Count unique lines with decorator
-            lines_with_decorator = [i for i, line in enumerate(content.split('\n')) 
-                                   if '@require_authentication' in line]
-            # It's OK if same line has multiple (was a paste error), but check structure
-            if len(lines_with_decorator) > 1:
-                issues.append(f"Duplicate decorators found ({decorator_count} occurrences)")
-        
-        # Check that main() has decorator
-        main_pattern = r"@require_authentication\s+def main\(\):"
-        if not re.search(main_pattern, content):
-            issues.append("main() function not decorated with @require_authentication")
+        # Ensure @require_authentication is not duplicated; several on the
+        # same line (a paste error) are tolerated
+        decorator_count = content.count(DECORATOR)
+        if decorator_count > 1 and self._count_lines_with(content, DECORATOR, limit=2) > 1:
+            issues.append(f"Duplicate decorators found ({decorator_count} occurrences)")
         
-        # Check for old UPLOAD_DIR/EXPORT_DIR (global) references
-        old_refs = []
-        if re.search(r"UPLOAD_DIR\s*(?!.*from)", content):
-            # Check if it's a direct UPLOAD_DIR usage (not in import)
-            for match in re.finditer(r"(UPLOAD_DIR|EXPORT_DIR)\s*(?!=)", content):
-                if "from config import" not in content[max(0, match.start()-100):match.start()]:
-                    old_refs.append("UPLOAD_DIR")
-                    break
+        if not main_decorated:
+            issues.append("main() function not decorated with @require_authentication")
         
+        # Old UPLOAD_DIR/EXPORT_DIR (global) references
         if old_refs:
-            issues.append(f"Found unhandled global directory references: {', '.join(set(old_refs))}")
+            names = ', '.join(sorted(name.decode('ascii') for name in old_refs))
+            issues.append(f"Found unhandled global directory references: {names}")
         
         return len(issues) == 0, issues
     
     def run_verification(self):
         """Run verification on all modules"""
-        print("\n" + "="*70)
-        print("Integration Verification - Multi-User Module Check")
-        print("="*70 + "\n")
+        self._emit("\n" + "="*70)
+        self._emit("Integration Verification - Multi-User Module Check")
+        self._emit("="*70 + "\n")
         
-        for module_name in MODULES_TO_CHECK:
-            ok, issues = self.check_module(module_name)
+        # A reader thread streams the files in order (at most two ahead)
+        # while the pool scans the ones already read; checks don't touch
+        # verifier state, and results are reported in MODULES_TO_CHECK order
+        # as each one completes. Unchanged modules come back with their
+        # cached result instead.
+        self._cache = self._load_cache()
+        prefetched = queue.Queue(maxsize=2)
+        threading.Thread(target=self._prefetch_modules, args=(prefetched,), daemon=True).start()
+        checked = []
+        with ThreadPoolExecutor(max_workers=min(len(MODULES_TO_CHECK), os.cpu_count() or 1)) as executor:
+            futures = []
+            for item in iter(prefetched.get, None):
+                if isinstance(item, Exception):
+                    raise RuntimeError("Reading the modules failed") from item
+                module_path, data, cached = item
+                if cached is None:
+                    futures.append(executor.submit(self._check_module_content, module_path, data))
+                else:
+                    future = Future()
+                    future.set_result(cached)
+                    futures.append(future)
             
-            if ok:
-                print(f"✅ {module_name:<30} - OK")
-                self.modules_ok += 1
-            else:
-                print(f"❌ {module_name:<30} - ISSUES FOUND:")
-                for issue in issues:
-                    print(f"   ├─ {issue}")
-                self.modules_issues += 1
-            
-            self.results.append({
-                "module": module_name,
-                "status": "OK" if ok else "ISSUES",
-                "issues": issues
-            })
+            for module_name, future in zip(MODULES_TO_CHECK, futures):
+                ok, issues = future.result()
+                checked.append((ok, issues))
+                if ok:
+                    self._emit(f"✅ {module_name:<30} - OK")
+                    self.modules_ok += 1
+                else:
+                    self._emit(f"❌ {module_name:<30} - ISSUES FOUND:")
+                    for issue in issues:
+                        self._emit(f"   ├─ {issue}")
+                    self.modules_issues += 1
+                if self.verbose:
+                    self._flush()
+                
+                self.results.append({
+                    "module": module_name,
+                    "status": "OK" if ok else "ISSUES",
+                    "issues": issues
+                })
+        self._save_cache(checked)
         
-        print("\n" + "="*70)
-        print("Summary")
-        print("="*70 + "\n")
+        self._emit("\n" + "="*70)
+        self._emit("Summary")
+        self._emit("="*70 + "\n")
         
         total = len(MODULES_TO_CHECK)
-        print(f"Total Modules: {total}")
-        print(f"✅ Properly Integrated: {self.modules_ok}")
-        print(f"❌ Issues Found: {self.modules_issues}")
-        print(f"Success Rate: {(self.modules_ok/total*100):.1f}%")
+        self._emit(f"Total Modules: {total}")
+        self._emit(f"✅ Properly Integrated: {self.modules_ok}")
+        self._emit(f"❌ Issues Found: {self.modules_issues}")
+        self._emit(f"Success Rate: {(self.modules_ok/total*100):.1f}%")
         
         if self.modules_issues > 0:
-            print("\n⚠️  Issues to resolve:")
+            self._emit("\n⚠️  Issues to resolve:")
             for result in self.results:
                 if result['status'] == 'ISSUES':
-                    print(f"\n{result['module']}:")
+                    self._emit(f"\n{result['module']}:")
                     for issue in result['issues']:
-                        print(f"  - {issue}")
+                        self._emit(f"  - {issue}")
         
-        print("\n" + "="*70)
+        self._emit("\n" + "="*70)
         if self.modules_issues == 0:
-            print("✅ ALL MODULES PROPERLY INTEGRATED!")
-            print("✅ Ready for multi-user testing")
+            self._emit("✅ ALL MODULES PROPERLY INTEGRATED!")
+            self._emit("✅ Ready for multi-user testing")
         else:
-            print("⚠️  Some modules need attention")
-        print("="*70 + "\n")
+            self._emit("⚠️  Some modules need attention")
+        self._emit("="*70 + "\n")
+        self._flush()
         
         return self.modules_issues == 0
 
     def verify_helper_functions(self):
         """Verify that utils/user_data.py has required functions"""
-        print("\n" + "="*70)
-        print("Verifying Helper Functions")
-        print("="*70 + "\n")
+        self._emit("\n" + "="*70)
+        self._emit("Verifying Helper Functions")
+        self._emit("="*70 + "\n")
         
         user_data_path = Path(__file__).parent.parent / "utils" / "user_data.py"
         
         if not user_data_path.exists():
-            print(f"❌ {user_data_path} not found!")
+            self._emit(f"❌ {user_data_path} not found!")
+            self._flush()
             return False
         
         required_functions = [
@@ -161,28 +357,34 @@ class IntegrationVerifier:
             with open(user_data_path, 'r', encoding='utf-8') as f:
                 content = f.read()
         except Exception as e:
-            print(f"❌ Error reading file: {e}")
+            self._emit(f"❌ Error reading file: {e}")
+            self._flush()
             return False
         
         all_found = True
         for func_name in required_functions:
             if f"def {func_name}" in content or f"class {func_name}" in content:
-                print(f"✅ {func_name}")
+                self._emit(f"✅ {func_name}")
             else:
-                print(f"❌ {func_name} - NOT FOUND")
+                self._emit(f"❌ {func_name} - NOT FOUND")
                 all_found = False
         
-        print("\n" + "="*70)
+        self._emit("\n" + "="*70)
         if all_found:
-            print("✅ All required helper functions found!")
+            self._emit("✅ All required helper functions found!")
         else:
-            print("❌ Some helper functions missing!")
-        print("="*70 + "\n")
+            self._emit("❌ Some helper functions missing!")
+        self._emit("="*70 + "\n")
+        self._flush()
         
         return all_found
 
 if __name__ == "__main__":
-    verifier = IntegrationVerifier()
+    parser = argparse.ArgumentParser(description="Verify multi-user integration of the feature modules")
+    parser.add_argument("--verbose", action="store_true", help="print each module's result as soon as it is checked")
+    args = parser.parse_args()
+    
+    verifier = IntegrationVerifier(verbose=args.verbose)
     
     # Verify helper functions first
     helpers_ok = verifier.verify_helper_functions()
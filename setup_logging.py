@@ -1,14 +1,49 @@
 # setup_logging.py
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from config import LOG_PATH
 
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+_listener = None
+
 def setup_logging():
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler(LOG_PATH),
-            logging.StreamHandler()
-        ]
-    )
-    return logging.getLogger(__name__)
\ No newline at end of file
+    """
+    Route all logging through a queue so callers never wait on file writes.
+
+    A background QueueListener writes each record to a size-rotated LOG_PATH
+    and to the console. Streamlit reruns app.py on every interaction, so the
+    listener is only started on the first call.
+    """
+    global _listener
+    if _listener is None:
+        log_queue = queue.Queue(-1)
+        formatter = logging.Formatter(LOG_FORMAT)
+        file_handler = RotatingFileHandler(
+            LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+        stream_handler = logging.StreamHandler()
+        file_handler.setFormatter(formatter)
+        stream_handler.setFormatter(formatter)
+        _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        # The listener's handlers apply LOG_FORMAT; the queue side only
+        # renders the message so it isn't formatted twice
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter("%(message)s"))
+        # force=True replaces the direct file/console handlers config.py installs
+        logging.basicConfig(level=logging.INFO, handlers=[queue_handler], force=True)
+
+        # LOG_FORMAT uses none of the thread/process fields or the caller's
+        # file and line, so skip collecting them (the frame walk included)
+        logging.logThreads = False
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+        logging._srcfile = None
+    return logging.getLogger(__name__)
@@ -13,7 +13,6 @@ os.environ['USE_POSTGRES'] = 'false'
 # Add the project root to the path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from utils.auth import AuthenticationManager
 from config import logger
 
 def test_authentication():
@@ -22,6 +21,8 @@ def test_authentication():
     print("TESTING AUTHENTICATION FIX")
     print("="*60 + "\n")
     
+    # Imported here so collecting this file doesn't load bcrypt and the auth DB
+    from utils.auth import AuthenticationManager
     auth = AuthenticationManager()
     
     # Test 1: Verify demo account exists
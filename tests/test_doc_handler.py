@@ -1,13 +1,10 @@
 # tests/test_document_handler.py
 from utils.document_handler import load_document
-from pathlib import Path
 
-def test_load_document():
-    # Create a test file
-    test_path = Path("test.txt")
-    with open(test_path, "w") as f:
-        f.write("Test content")
+def test_load_document(tmp_path):
+    # Per-test temp dir, so parallel runs never share the file
+    test_path = tmp_path / "test.txt"
+    test_path.write_text("Test content")
     text, meta = load_document(test_path)
     assert text == "Test content"
-    assert meta["title"] == "test"
-    test_path.unlink()
\ No newline at end of file
+    assert meta["title"] == "test"
\ No newline at end of file
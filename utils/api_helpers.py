@@ -1,34 +1,150 @@
 # utils/api_helpers.py
-from semanticscholar import SemanticScholar
-import arxiv
-try:
-    from habanero import Crossref, counts
-    HAS_HABANERO = True
-except ImportError:
-    Crossref = None
-    counts = None
-    HAS_HABANERO = False
-
-from typing import List, Dict, Any
+# semanticscholar, arxiv and habanero are imported on first use: importing
+# this module (every feature page does) shouldn't pay for all three clients
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Iterator, List, Dict, Any
+import json
+import random
+import sqlite3
 import time
-from config import SEMANTIC_SCHOLAR_API_KEY, logger
+from config import CACHE_DIR, SEMANTIC_SCHOLAR_API_KEY, UNPAYWALL_EMAIL, logger
 
-cr = Crossref() if HAS_HABANERO else None
-sch = SemanticScholar(api_key=SEMANTIC_SCHOLAR_API_KEY) if SEMANTIC_SCHOLAR_API_KEY else SemanticScholar()
+# Shared keep-alive session for direct HTTP lookups, so repeated calls skip
+# the TCP/TLS handshake; retries back off on rate limits and server errors
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+))
 
-def fetch_papers(query: str, limit: int = 10) -> List[Dict]:
-    """Fetch papers from Semantic Scholar with rate limit handling."""
+# Concurrent lookups in the *_many helpers. Kept modest for the public APIs:
+# Unpaywall allows 100k calls/day, CrossRef's polite pool a few per second.
+# 429s are retried after their Retry-After delay by the session above.
+FETCH_WORKERS = 8
+
+# Extra Semantic Scholar attempts after a 429/504, with exponential backoff
+SEARCH_RETRIES = 3
+
+# DOI metadata rarely changes, so lookups are kept on disk for 30 days
+API_CACHE_PATH = CACHE_DIR / "api_cache.db"
+API_CACHE_TTL = 30 * 24 * 3600
+
+
+@lru_cache(maxsize=1)
+def _get_cr():
+    """CrossRef client, created on first use (None without habanero)."""
     try:
-        results = sch.search_paper(query, limit=limit)
-        return [paper.raw_data for paper in results]  # Raw for details
+        from habanero import Crossref
+    except ImportError:
+        return None
+    return Crossref()
+
+
+@lru_cache(maxsize=1)
+def _get_sch():
+    """Semantic Scholar client, created on first use.
+
+    The library's own retry waits a fixed 30s per 429, up to 10 times;
+    fetch_papers backs off itself instead.
+    """
+    from semanticscholar import SemanticScholar
+    if SEMANTIC_SCHOLAR_API_KEY:
+        return SemanticScholar(api_key=SEMANTIC_SCHOLAR_API_KEY, retry=False)
+    return SemanticScholar(retry=False)
+
+def _cache_connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(API_CACHE_PATH, timeout=10)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS api_cache (
+            source TEXT NOT NULL,
+            key TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (source, key)
+        )
+        """
+    )
+    return conn
+
+def _cached_fetch(source: str, key: str, fetch: Callable[[], Dict]) -> Dict:
+    """`fetch()` for (source, key), served from the disk cache while fresh.
+
+    Empty results (not found, errors) are never stored, so they are retried.
+    Each call decodes its own copy, so callers may modify the result.
+    """
+    try:
+        conn = _cache_connect()
+        try:
+            row = conn.execute(
+                "SELECT response FROM api_cache WHERE source = ? AND key = ? AND created_at > ?",
+                (source, key, time.time() - API_CACHE_TTL),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is not None:
+            return json.loads(row[0])
     except Exception as e:
-        logger.error(f"Semantic Scholar error: {e}")
-        time.sleep(1)  # Rate limit backoff
-        return []
+        logger.warning(f"API cache read failed: {e}")
+
+    result = fetch()
+    if result:
+        try:
+            conn = _cache_connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO api_cache (source, key, response, created_at) VALUES (?, ?, ?, ?)",
+                    (source, key, json.dumps(result), time.time()),
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"API cache write failed: {e}")
+    return result
+
+def clear_api_cache() -> None:
+    """Drop every cached API response."""
+    conn = _cache_connect()
+    try:
+        conn.execute("DELETE FROM api_cache")
+        conn.commit()
+    finally:
+        conn.close()
+
+def fetch_papers(query: str, limit: int = 10) -> List[Dict]:
+    """Fetch papers from Semantic Scholar with rate limit handling."""
+    from semanticscholar.SemanticScholarException import GatewayTimeoutException
+    for attempt in range(SEARCH_RETRIES + 1):
+        try:
+            results = _get_sch().search_paper(query, limit=limit)
+            return [paper.raw_data for paper in results]  # Raw for details
+        except (ConnectionRefusedError, GatewayTimeoutException) as e:
+            # 429 (raised by the library as ConnectionRefusedError) or 504:
+            # back off with jitter; the library doesn't expose Retry-After
+            if attempt == SEARCH_RETRIES:
+                logger.error(f"Semantic Scholar error: {e}")
+                return []
+            delay = min(60, 2 ** attempt) + random.uniform(0, 0.5)
+            logger.warning(f"Semantic Scholar busy ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+        except Exception as e:
+            logger.error(f"Semantic Scholar error: {e}")
+            return []
 
 def fetch_by_doi(doi: str) -> Dict[str, Any]:
-    """Fetch by DOI using CrossRef."""
-    if not HAS_HABANERO or cr is None:
+    """Fetch by DOI using CrossRef (cached on disk)."""
+    return _cached_fetch("crossref", doi.strip().lower(), lambda: _fetch_by_doi_uncached(doi))
+
+def _fetch_by_doi_uncached(doi: str) -> Dict[str, Any]:
+    cr = _get_cr()
+    if cr is None:
         logger.warning("habanero not available - install with: pip install habanero")
         return {}
     try:
@@ -37,18 +153,42 @@ def fetch_by_doi(doi: str) -> Dict[str, Any]:
         logger.error(f"CrossRef error: {e}")
         return {}
 
+def iter_arxiv(query: str, limit: int = 10) -> Iterator[Dict]:
+    """Yield arXiv results one at a time as they are fetched."""
+    import arxiv
+    search = arxiv.Search(query=query, max_results=limit)
+    for result in search.results():
+        yield vars(result)
+
 def fetch_arxiv(query: str, limit: int = 10) -> List[Dict]:
     """Fetch from arXiv."""
-    search = arxiv.Search(query=query, max_results=limit)
-    return [vars(result) for result in search.results()]
+    return list(iter_arxiv(query, limit))
 
 def fetch_unpaywall(doi: str) -> Dict:
-    """Fetch open access URL (requires email)."""
-    import requests
-    url = f"https://api.unpaywall.org/{doi}?email=your@email.com"  # Replace email
+    """Fetch open access URL (requires UNPAYWALL_EMAIL; cached on disk)."""
+    return _cached_fetch("unpaywall", doi.strip().lower(), lambda: _fetch_unpaywall_uncached(doi))
+
+def _fetch_unpaywall_uncached(doi: str) -> Dict:
+    url = f"https://api.unpaywall.org/{doi}"
     try:
-        response = requests.get(url)
+        response = _SESSION.get(url, params={"email": UNPAYWALL_EMAIL}, timeout=(5, 15))
         return response.json() if response.ok else {}
     except Exception as e:
         logger.error(f"Unpaywall error: {e}")
-        return {}
\ No newline at end of file
+        return {}
+
+def _fetch_many(dois: List[str], fetch, workers: int = FETCH_WORKERS) -> Dict[str, Dict]:
+    """Run a per-DOI fetch over unique DOIs on a thread pool; returns {doi: result}."""
+    unique = list(dict.fromkeys(dois))
+    if len(unique) < 2:
+        return {doi: fetch(doi) for doi in unique}
+    with ThreadPoolExecutor(max_workers=min(workers, len(unique))) as executor:
+        return dict(zip(unique, executor.map(fetch, unique)))
+
+def fetch_by_doi_many(dois: List[str], workers: int = FETCH_WORKERS) -> Dict[str, Dict[str, Any]]:
+    """`fetch_by_doi` for several DOIs concurrently."""
+    return _fetch_many(dois, fetch_by_doi, workers)
+
+def fetch_unpaywall_many(dois: List[str], workers: int = FETCH_WORKERS) -> Dict[str, Dict]:
+    """`fetch_unpaywall` for several DOIs concurrently."""
+    return _fetch_many(dois, fetch_unpaywall, workers)
@@ -3,11 +3,19 @@ User Authentication Module - Industry-Grade Implementation
 Uses bcrypt for password hashing and SQLite for user storage.
 """
 
+import atexit
+import os
+import queue
 import sqlite3
 import hashlib
 import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, Iterator, List
 from pathlib import Path
 import bcrypt
 from config import logger, USE_POSTGRES, DATABASE_URL
@@ -17,31 +25,151 @@ try:
 except Exception:
     psycopg = None
 
+# Unique-constraint failures on either backend, reported as duplicate users
+_UNIQUE_VIOLATIONS = (sqlite3.IntegrityError,)
+if psycopg is not None:
+    _UNIQUE_VIOLATIONS += (psycopg.errors.UniqueViolation,)
+
+try:
+    from psycopg_pool import ConnectionPool
+except Exception:
+    ConnectionPool = None
+
 # Database path for users
 AUTH_DB_PATH = Path("db/auth.db")
 AUTH_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+# SQLite page cache (negative = KiB) and memory-mapped I/O window per connection
+SQLITE_CACHE_SIZE = -20000
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+# Idle SQLite connections kept open for reuse
+SQLITE_POOL_SIZE = 8
+
+# Long-lived PostgreSQL connections shared by all auth calls
+PG_POOL_MIN_SIZE = 5
+PG_POOL_MAX_SIZE = 20
+PG_POOL_MAX_IDLE = 600  # seconds before an idle surplus connection is closed
+
+# bcrypt work factor for new hashes. Each hash records its own cost, so
+# changing this never affects verification of existing passwords.
+BCRYPT_COST = int(os.environ.get("BCRYPT_COST", "10"))
+
+# In-process cache of user rows used by login / password checks
+USER_CACHE_SIZE = 1024
+USER_CACHE_TTL = 60.0  # seconds; bounds staleness from writes in other processes
+
+# In-process cache of valid session tokens used by verify_session
+SESSION_CACHE_SIZE = 10000
+SESSION_CACHE_TTL = 60.0  # seconds; bounds staleness from logouts in other processes
+
+# login_history rows are written behind the login path in batches
+LOGIN_BATCH_SIZE = 500
+LOGIN_FLUSH_INTERVAL = 1.0  # seconds a batch waits to fill before it is written
+
+# bcrypt releases the GIL, so a thread per core runs hashes truly in parallel;
+# routing every hash/check through one shared pool also caps concurrent KDF
+# work at the core count when many logins arrive at once.
+_bcrypt_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="bcrypt")
+
+
+def _hash_password(password: str) -> bytes:
+    """bcrypt-hash a password at BCRYPT_COST on the shared bcrypt pool."""
+    return _bcrypt_pool.submit(bcrypt.hashpw, password.encode(), bcrypt.gensalt(rounds=BCRYPT_COST)).result()
+
+
+def _check_password(password: str, password_hash: bytes) -> bool:
+    """Verify a password against its stored hash on the shared bcrypt pool."""
+    return _bcrypt_pool.submit(bcrypt.checkpw, password.encode(), password_hash).result()
+
 
 class AuthenticationManager:
     """Manages user authentication, registration, and session management."""
 
     def __init__(self, db_path: str = str(AUTH_DB_PATH)):
         self.db_path = db_path
-        if not (USE_POSTGRES and psycopg is not None):
+        self._user_cache: "OrderedDict[str, Tuple[float, Tuple[int, bytes, bool]]]" = OrderedDict()
+        self._user_cache_lock = threading.Lock()
+        self._session_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._session_cache_lock = threading.Lock()
+        self._pg_pool = None
+        self._sqlite_pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=SQLITE_POOL_SIZE)
+        self._login_queue: "queue.Queue[Optional[Tuple[int, bool]]]" = queue.Queue()
+        self._login_writer: Optional[threading.Thread] = None
+        self._login_writer_lock = threading.Lock()
+        if USE_POSTGRES and psycopg is not None:
+            if ConnectionPool is not None:
+                self._pg_pool = ConnectionPool(
+                    DATABASE_URL,
+                    min_size=PG_POOL_MIN_SIZE,
+                    max_size=PG_POOL_MAX_SIZE,
+                    max_idle=PG_POOL_MAX_IDLE,
+                    open=True,
+                )
+        else:
             # SQLite performance pragmas
             conn = sqlite3.connect(self.db_path)
             conn.execute('PRAGMA journal_mode=WAL')
             conn.execute('PRAGMA busy_timeout=10000')  # 10 seconds
-            conn.execute('PRAGMA synchronous=FULL')  # Ensure all writes are synced
+            conn.execute('PRAGMA synchronous=NORMAL')  # Crash-safe under WAL without an fsync per commit
             conn.close()
         self._init_auth_db()
         self._ensure_demo_user()  # Create demo account on startup
 
+    def _connect(self) -> sqlite3.Connection:
+        """Open the SQLite auth database with per-connection tuning applied."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute('PRAGMA busy_timeout=10000')
+        # synchronous is a per-connection setting, so pooled connections need it too
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size={SQLITE_CACHE_SIZE}')
+        conn.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
+    @contextmanager
+    def _sqlite_conn(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a tuned SQLite connection from the pool, opening one if none is idle.
+
+        Uncommitted work is rolled back before the connection is put back, so
+        the next borrower never inherits an open transaction or write lock.
+        """
+        try:
+            conn = self._sqlite_pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+            try:
+                self._sqlite_pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def _pg_connection(self):
+        """Borrow a PostgreSQL connection; commits on success and is returned on exit."""
+        if self._pg_pool is not None:
+            return self._pg_pool.connection()
+        return psycopg.connect(DATABASE_URL)
+
+    def close(self) -> None:
+        """Flush pending login history, then close pooled database connections."""
+        self._stop_login_writer()
+        if self._pg_pool is not None:
+            self._pg_pool.close()
+            self._pg_pool = None
+        while True:
+            try:
+                self._sqlite_pool.get_nowait().close()
+            except queue.Empty:
+                break
+
     def _init_auth_db(self) -> None:
         """Initialize authentication database with users and sessions tables."""
         try:
             if USE_POSTGRES and psycopg is not None:
-                with psycopg.connect(DATABASE_URL) as conn:
+                with self._pg_connection() as conn:
                     with conn.cursor() as c:
                         c.execute(
                             """
@@ -78,48 +206,59 @@ class AuthenticationManager:
                             )
                             """
                         )
+                        # session_token is UNIQUE already; the composite index also
+                        # covers the expiry check in verify_session
+                        c.execute(
+                            "CREATE INDEX IF NOT EXISTS idx_sessions_token_exp ON sessions(session_token, expires_at)"
+                        )
+                        c.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id)")
+                        c.execute(
+                            "CREATE INDEX IF NOT EXISTS idx_login_hist_user ON login_history(user_id, login_time)"
+                        )
                     conn.commit()
                 logger.info("✅ Authentication database initialized")
                 return
 
             # SQLite fallback
-            conn = sqlite3.connect(self.db_path)
-            conn.execute('PRAGMA journal_mode=WAL')
-            conn.execute('PRAGMA busy_timeout=5000')
-            c = conn.cursor()
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    email TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    is_active BOOLEAN DEFAULT 1
-                )
-            ''')
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS sessions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    session_token TEXT UNIQUE NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    expires_at DATETIME NOT NULL,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-                )
-            ''')
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS login_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    login_time DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    success BOOLEAN DEFAULT 1,
-                    ip_address TEXT,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-                )
-            ''')
-            conn.commit()
-            conn.close()
+            with self._sqlite_conn() as conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                c = conn.cursor()
+                c.execute('''
+                    CREATE TABLE IF NOT EXISTS users (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        username TEXT UNIQUE NOT NULL,
+                        email TEXT UNIQUE NOT NULL,
+                        password_hash TEXT NOT NULL,
+                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        is_active BOOLEAN DEFAULT 1
+                    )
+                ''')
+                c.execute('''
+                    CREATE TABLE IF NOT EXISTS sessions (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_id INTEGER NOT NULL,
+                        session_token TEXT UNIQUE NOT NULL,
+                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        expires_at DATETIME NOT NULL,
+                        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+                    )
+                ''')
+                c.execute('''
+                    CREATE TABLE IF NOT EXISTS login_history (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_id INTEGER NOT NULL,
+                        login_time DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        success BOOLEAN DEFAULT 1,
+                        ip_address TEXT,
+                        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+                    )
+                ''')
+                # Create indexes for faster queries
+                c.execute('CREATE INDEX IF NOT EXISTS idx_sessions_token_exp ON sessions(session_token, expires_at)')
+                c.execute('CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id)')
+                c.execute('CREATE INDEX IF NOT EXISTS idx_login_hist_user ON login_history(user_id, login_time)')
+                conn.commit()
             logger.info("✅ Authentication database initialized")
         except Exception as e:
             logger.error(f"❌ Auth DB initialization error: {e}")
@@ -150,10 +289,10 @@ class AuthenticationManager:
 
         try:
             # Hash password with bcrypt
-            password_hash_bytes = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=12))
+            password_hash_bytes = _hash_password(password)
 
             if USE_POSTGRES and psycopg is not None:
-                with psycopg.connect(DATABASE_URL) as conn:
+                with self._pg_connection() as conn:
                     with conn.cursor() as c:
                         # Store as TEXT for portability
                         c.execute(
@@ -162,36 +301,258 @@ class AuthenticationManager:
                         )
                     conn.commit()
             else:
-                conn = sqlite3.connect(self.db_path)
-                c = conn.cursor()
-                c.execute(
-                    "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
-                    (username, email, password_hash_bytes),
-                )
-                conn.commit()
-                # Verify the insert was successful
-                c.execute("SELECT id FROM users WHERE username = ?", (username,))
-                result = c.fetchone()
-                if not result:
-                    conn.close()
-                    logger.error(f"❌ Registration verification failed for {username}")
-                    return False, "❌ Registration failed - please try again"
-                conn.close()
-
+                # Rolled back on IntegrityError too, so the failed INSERT's write lock is released
+                with self._sqlite_conn() as conn:
+                    c = conn.cursor()
+                    c.execute(
+                        "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
+                        (username, email, password_hash_bytes),
+                    )
+                    conn.commit()
+                    # Verify the insert was successful
+                    c.execute("SELECT id FROM users WHERE username = ?", (username,))
+                    result = c.fetchone()
+                    if not result:
+                        logger.error(f"❌ Registration verification failed for {username}")
+                        return False, "❌ Registration failed - please try again"
+
+            self._invalidate_user(username)
             logger.info(f"✅ User registered: {username}")
             return True, "✅ Registration successful! Please log in."
 
-        except sqlite3.IntegrityError as e:
+        except _UNIQUE_VIOLATIONS as e:
             logger.warning(f"⚠️ Registration failed for {username}: {str(e)}")
-            if "username" in str(e):
+            # PostgreSQL names the constraint (users_username_key / users_email_key);
+            # SQLite puts the column in the message
+            diag = getattr(e, "diag", None)
+            detail = (diag.constraint_name if diag is not None else None) or str(e)
+            if "username" in detail:
                 return False, "❌ Username already exists"
-            elif "email" in str(e):
+            elif "email" in detail:
                 return False, "❌ Email already registered"
             return False, "❌ Registration failed"
         except Exception as e:
             logger.error(f"❌ Unexpected registration error: {e}")
             return False, f"❌ Registration error: {str(e)}"
 
+    def register_user_prehashed(
+        self, username: str, email: str, password_hash: str
+    ) -> Tuple[bool, str]:
+        """
+        Register a user whose bcrypt hash was computed ahead of time.
+
+        Skips the password policy check and the KDF; intended for fixed seed
+        accounts whose hashes are shipped as constants.
+        """
+        return self.register_users_bulk([(username, email, password_hash)], prehashed=True)[0]
+
+    def register_users_bulk(
+        self, users: List[Tuple[str, str, str]], prehashed: bool = False
+    ) -> List[Tuple[bool, str]]:
+        """
+        Register many users in a single transaction.
+
+        Rows that fail validation or clash with an existing username/email are
+        skipped; the rest are hashed in parallel and inserted in one batch.
+
+        Args:
+            users: List of (username, email, password) tuples
+            prehashed: Treat the third field as an existing bcrypt hash
+
+        Returns:
+            List of (success: bool, message: str), one per input row
+        """
+        results: List[Tuple[bool, str]] = [(False, "")] * len(users)
+        pending = []
+        for i, (username, email, password) in enumerate(users):
+            if not prehashed and not self._validate_password(password):
+                results[i] = (False, "❌ Password must be at least 8 characters with uppercase, lowercase, and numbers")
+            elif len(username) < 3 or len(username) > 20:
+                results[i] = (False, "❌ Username must be 3-20 characters")
+            elif "@" not in email or "." not in email.split("@")[1]:
+                results[i] = (False, "❌ Invalid email format")
+            else:
+                pending.append(i)
+
+        if not pending:
+            return results
+
+        try:
+            use_pg = USE_POSTGRES and psycopg is not None
+            ph = "%s" if use_pg else "?"
+            with self._pg_connection() if use_pg else self._sqlite_conn() as conn:
+                c = conn.cursor()
+                names = [users[i][0] for i in pending]
+                emails = [users[i][1] for i in pending]
+                c.execute(
+                    f"SELECT username FROM users WHERE username IN ({','.join([ph] * len(names))})", names
+                )
+                taken_names = {row[0] for row in c.fetchall()}
+                c.execute(
+                    f"SELECT email FROM users WHERE email IN ({','.join([ph] * len(emails))})", emails
+                )
+                taken_emails = {row[0] for row in c.fetchall()}
+
+                to_insert = []
+                seen_names, seen_emails = set(), set()
+                for i in pending:
+                    username, email, _ = users[i]
+                    if username in taken_names or username in seen_names:
+                        results[i] = (False, "❌ Username already exists")
+                    elif email in taken_emails or email in seen_emails:
+                        results[i] = (False, "❌ Email already registered")
+                    else:
+                        seen_names.add(username)
+                        seen_emails.add(email)
+                        to_insert.append(i)
+
+                if to_insert:
+                    if prehashed:
+                        hashes = [
+                            h.encode() if isinstance(h, str) else h for h in (users[i][2] for i in to_insert)
+                        ]
+                    else:
+                        hashes = list(_bcrypt_pool.map(
+                            lambda pw: bcrypt.hashpw(pw.encode(), bcrypt.gensalt(rounds=BCRYPT_COST)),
+                            [users[i][2] for i in to_insert],
+                        ))
+                    c.executemany(
+                        f"INSERT INTO users (username, email, password_hash) VALUES ({ph}, {ph}, {ph})",
+                        [
+                            (users[i][0], users[i][1], h.decode() if use_pg else h)
+                            for i, h in zip(to_insert, hashes)
+                        ],
+                    )
+                    conn.commit()
+                    for i in to_insert:
+                        self._invalidate_user(users[i][0])
+                        results[i] = (True, "✅ Registration successful! Please log in.")
+                    logger.info(f"✅ Bulk-registered {len(to_insert)} user(s)")
+
+        except Exception as e:
+            logger.error(f"❌ Bulk registration error: {e}")
+            for i in pending:
+                if not results[i][1]:
+                    results[i] = (False, f"❌ Registration error: {str(e)}")
+
+        return results
+
+    def _query_user(self, username: str) -> Optional[Tuple[int, bytes, bool]]:
+        """Read (id, password_hash, is_active) for a username from the database."""
+        if USE_POSTGRES and psycopg is not None:
+            with self._pg_connection() as conn:
+                with conn.cursor() as c:
+                    c.execute(
+                        "SELECT id, password_hash, is_active FROM users WHERE username = %s",
+                        (username,),
+                        prepare=True,
+                    )
+                    result = c.fetchone()
+        else:
+            with self._sqlite_conn() as conn:
+                result = conn.execute(
+                    "SELECT id, password_hash, is_active FROM users WHERE username = ?",
+                    (username,),
+                ).fetchone()
+
+        if result is None:
+            return None
+        user_id, password_hash, is_active = result
+        if isinstance(password_hash, str):
+            password_hash = password_hash.encode()
+        return user_id, password_hash, bool(is_active)
+
+    def _fetch_user(self, username: str) -> Optional[Tuple[int, bytes, bool]]:
+        """
+        (id, password_hash, is_active) for a username, served from an LRU cache.
+
+        Entries expire after USER_CACHE_TTL seconds so changes made by other
+        processes are picked up; writes in this process invalidate immediately.
+        """
+        now = time.monotonic()
+        with self._user_cache_lock:
+            entry = self._user_cache.get(username)
+            if entry is not None and now - entry[0] < USER_CACHE_TTL:
+                self._user_cache.move_to_end(username)
+                return entry[1]
+
+        row = self._query_user(username)
+        if row is not None:
+            with self._user_cache_lock:
+                self._user_cache[username] = (now, row)
+                self._user_cache.move_to_end(username)
+                while len(self._user_cache) > USER_CACHE_SIZE:
+                    self._user_cache.popitem(last=False)
+        return row
+
+    def _invalidate_user(self, username: str) -> None:
+        """Drop a cached user row after it has been written."""
+        with self._user_cache_lock:
+            self._user_cache.pop(username, None)
+
+    def _record_login(self, user_id: int, success: bool) -> None:
+        """Queue a login_history entry for the background writer."""
+        if self._login_writer is None:
+            with self._login_writer_lock:
+                if self._login_writer is None:
+                    self._login_writer = threading.Thread(
+                        target=self._run_login_writer, name="login-history-writer", daemon=True
+                    )
+                    self._login_writer.start()
+                    # Daemon threads are killed at exit, so flush what is still queued
+                    atexit.register(self._stop_login_writer)
+        self._login_queue.put((user_id, success))
+
+    def _run_login_writer(self) -> None:
+        """Drain the login queue, writing up to LOGIN_BATCH_SIZE rows per transaction."""
+        stopping = False
+        while not stopping:
+            batch = []
+            item = self._login_queue.get()
+            deadline = time.monotonic() + LOGIN_FLUSH_INTERVAL
+            while True:
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= LOGIN_BATCH_SIZE:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._login_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write_logins(batch)
+                except Exception as e:
+                    logger.error(f"❌ Failed to write {len(batch)} login history row(s): {e}")
+
+    def _stop_login_writer(self) -> None:
+        """Write any queued login history and stop the writer thread."""
+        with self._login_writer_lock:
+            writer, self._login_writer = self._login_writer, None
+        if writer is not None:
+            self._login_queue.put(None)
+            writer.join()
+
+    def _write_logins(self, batch: List[Tuple[int, bool]]) -> None:
+        """Insert a batch of (user_id, success) login_history rows in one transaction."""
+        if USE_POSTGRES and psycopg is not None:
+            with self._pg_connection() as conn:
+                with conn.cursor() as c:
+                    c.executemany("INSERT INTO login_history (user_id, success) VALUES (%s, %s)", batch)
+                conn.commit()
+            return
+        with self._sqlite_conn() as conn:
+            conn.executemany(
+                "INSERT INTO login_history (user_id, success) VALUES (?, ?)",
+                [(user_id, int(success)) for user_id, success in batch],
+            )
+            conn.commit()
+
     def authenticate_user(self, username: str, password: str) -> Tuple[bool, str, Optional[str]]:
         """
         Authenticate user and create session.
@@ -204,78 +565,24 @@ class AuthenticationManager:
             Tuple of (success: bool, message: str, session_token: str or None)
         """
         try:
-            if USE_POSTGRES and psycopg is not None:
-                with psycopg.connect(DATABASE_URL) as conn:
-                    with conn.cursor() as c:
-                        c.execute(
-                            "SELECT id, password_hash FROM users WHERE username = %s AND is_active = TRUE",
-                            (username,),
-                        )
-                        result = c.fetchone()
-                        if result is None:
-                            logger.warning(f"⚠️ Failed login attempt: user {username} not found")
-                            return False, "❌ Invalid username or password", None
-                        user_id, password_hash = result
-                        if isinstance(password_hash, str):
-                            password_hash_bytes = password_hash.encode()
-                        else:
-                            password_hash_bytes = password_hash
-                        if not bcrypt.checkpw(password.encode(), password_hash_bytes):
-                            logger.warning(f"⚠️ Failed login attempt: wrong password for {username}")
-                            c.execute(
-                                "INSERT INTO login_history (user_id, success) VALUES (%s, %s)",
-                                (user_id, False),
-                            )
-                            conn.commit()
-                            return False, "❌ Invalid username or password", None
-                        session_token = self._create_session(user_id)
-                        c.execute(
-                            "INSERT INTO login_history (user_id, success) VALUES (%s, %s)",
-                            (user_id, True),
-                        )
-                        conn.commit()
-                        logger.info(f"✅ User authenticated: {username}")
-                        return True, "✅ Login successful!", session_token
-            
-            # SQLite path
-            conn = sqlite3.connect(self.db_path)
-            conn.execute('PRAGMA journal_mode=WAL')
-            conn.execute('PRAGMA busy_timeout=10000')
-            c = conn.cursor()
-            c.execute(
-                "SELECT id, password_hash FROM users WHERE username = ? AND is_active = 1",
-                (username,),
-            )
-            result = c.fetchone()
-
-            if result is None:
-                conn.close()
+            user = self._fetch_user(username)
+            if user is None or not user[2]:
                 logger.warning(f"⚠️ Failed login attempt: user {username} not found")
                 return False, "❌ Invalid username or password", None
 
-            user_id, password_hash = result
+            user_id, password_hash, _ = user
 
             # Verify password with bcrypt
-            if not bcrypt.checkpw(password.encode(), password_hash):
+            if not _check_password(password, password_hash):
                 logger.warning(f"⚠️ Failed login attempt: wrong password for {username}")
-                c.execute(
-                    "INSERT INTO login_history (user_id, success) VALUES (?, ?)",
-                    (user_id, 0),
-                )
-                conn.commit()
-                conn.close()
+                self._record_login(user_id, False)
                 return False, "❌ Invalid username or password", None
 
             # Create session token
             session_token = self._create_session(user_id)
 
             # Log successful login
-            c.execute(
-                "INSERT INTO login_history (user_id, success) VALUES (?, ?)",
-                (user_id, 1),
-            )
-            conn.commit()
-            conn.close()
+            self._record_login(user_id, True)
 
             logger.info(f"✅ User authenticated: {username}")
             return True, "✅ Login successful!", session_token
@@ -291,7 +598,7 @@ class AuthenticationManager:
 
         try:
             if USE_POSTGRES and psycopg is not None:
-                with psycopg.connect(DATABASE_URL) as conn:
+                with self._pg_connection() as conn:
                     with conn.cursor() as c:
                         c.execute(
                             "INSERT INTO sessions (user_id, session_token, expires_at) VALUES (%s, %s, %s)",
@@ -299,14 +606,12 @@ class AuthenticationManager:
                         )
                     conn.commit()
                 return session_token
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute(
-                "INSERT INTO sessions (user_id, session_token, expires_at) VALUES (?, ?, ?)",
-                (user_id, session_token, expires_at),
-            )
-            conn.commit()
-            conn.close()
+            with self._sqlite_conn() as conn:
+                conn.execute(
+                    "INSERT INTO sessions (user_id, session_token, expires_at) VALUES (?, ?, ?)",
+                    (user_id, session_token, expires_at),
+                )
+                conn.commit()
             return session_token
         except Exception as e:
             logger.error(f"❌ Session creation error: {e}")
@@ -315,41 +620,60 @@ class AuthenticationManager:
     def verify_session(self, session_token: str) -> Tuple[bool, Optional[str]]:
         """
         Verify session token and return username if valid.
+
+        Valid tokens are cached for up to SESSION_CACHE_TTL seconds (never past
+        the session's own expiry); logout_user drops the entry immediately.
         
         Returns:
             Tuple of (is_valid: bool, username: str or None)
         """
+        now = time.monotonic()
+        with self._session_cache_lock:
+            entry = self._session_cache.get(session_token)
+            if entry is not None:
+                if now < entry[0]:
+                    self._session_cache.move_to_end(session_token)
+                    return True, entry[1]
+                del self._session_cache[session_token]
+
         try:
             if USE_POSTGRES and psycopg is not None:
-                with psycopg.connect(DATABASE_URL) as conn:
+                with self._pg_connection() as conn:
                     with conn.cursor() as c:
                         c.execute(
                             """
-                            SELECT u.username FROM sessions s
+                            SELECT u.username, s.expires_at FROM sessions s
                             JOIN users u ON s.user_id = u.id
                             WHERE s.session_token = %s AND s.expires_at > %s AND u.is_active = TRUE
                             """,
                             (session_token, datetime.now()),
+                            # Parsed and planned once per pooled connection
+                            prepare=True,
                         )
                         result = c.fetchone()
-                if result:
-                    return True, result[0]
-                return False, None
+            else:
+                with self._sqlite_conn() as conn:
+                    result = conn.execute(
+                        """SELECT u.username, s.expires_at FROM sessions s 
+                           JOIN users u ON s.user_id = u.id 
+                           WHERE s.session_token = ? AND s.expires_at > ? AND u.is_active = 1""",
+                        (session_token, datetime.now()),
+                    ).fetchone()
 
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute(
-                """SELECT u.username FROM sessions s 
-                   JOIN users u ON s.user_id = u.id 
-                   WHERE s.session_token = ? AND s.expires_at > ? AND u.is_active = 1""",
-                (session_token, datetime.now()),
-            )
-            result = c.fetchone()
-            conn.close()
+            if not result:
+                return False, None
 
-            if result:
-                return True, result[0]
-            return False, None
+            username, expires_at = result
+            if isinstance(expires_at, str):
+                expires_at = datetime.fromisoformat(expires_at)
+            ttl = min(SESSION_CACHE_TTL, expires_at.timestamp() - time.time())
+            if ttl > 0:
+                with self._session_cache_lock:
+                    self._session_cache[session_token] = (now + ttl, username)
+                    self._session_cache.move_to_end(session_token)
+                    while len(self._session_cache) > SESSION_CACHE_SIZE:
+                        self._session_cache.popitem(last=False)
+            return True, username
 
         except Exception as e:
             logger.error(f"❌ Session verification error: {e}")
@@ -357,19 +681,19 @@ class AuthenticationManager:
 
     def logout_user(self, session_token: str) -> bool:
         """Invalidate user session."""
+        with self._session_cache_lock:
+            self._session_cache.pop(session_token, None)
         try:
             if USE_POSTGRES and psycopg is not None:
-                with psycopg.connect(DATABASE_URL) as conn:
+                with self._pg_connection() as conn:
                     with conn.cursor() as c:
                         c.execute("DELETE FROM sessions WHERE session_token = %s", (session_token,))
                     conn.commit()
                 logger.info("✅ User logged out successfully")
                 return True
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("DELETE FROM sessions WHERE session_token = ?", (session_token,))
-            conn.commit()
-            conn.close()
+            with self._sqlite_conn() as conn:
+                conn.execute("DELETE FROM sessions WHERE session_token = ?", (session_token,))
+                conn.commit()
             logger.info("✅ User logged out successfully")
             return True
         except Exception as e:
@@ -380,7 +704,7 @@ class AuthenticationManager:
         """Get user information by username."""
         try:
             if USE_POSTGRES and psycopg is not None:
-                with psycopg.connect(DATABASE_URL) as conn:
+                with self._pg_connection() as conn:
                     with conn.cursor() as c:
                         c.execute(
                             "SELECT id, username, email, created_at FROM users WHERE username = %s",
@@ -396,14 +720,11 @@ class AuthenticationManager:
                     }
                 return None
 
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute(
-                "SELECT id, username, email, created_at FROM users WHERE username = ?",
-                (username,),
-            )
-            result = c.fetchone()
-            conn.close()
+            with self._sqlite_conn() as conn:
+                result = conn.execute(
+                    "SELECT id, username, email, created_at FROM users WHERE username = ?",
+                    (username,),
+                ).fetchone()
 
             if result:
                 return {
@@ -417,6 +738,15 @@ class AuthenticationManager:
             logger.error(f"❌ Error fetching user info: {e}")
             return None
 
+    def get_user_id(self, username: str) -> Optional[int]:
+        """Get a user's id, served from the user-row cache when possible."""
+        try:
+            row = self._fetch_user(username)
+        except Exception as e:
+            logger.error(f"❌ Error fetching user id: {e}")
+            return None
+        return row[0] if row else None
+
     def change_password(
         self, username: str, old_password: str, new_password: str
     ) -> Tuple[bool, str]:
@@ -425,51 +755,35 @@ class AuthenticationManager:
             return False, "❌ New password must be at least 8 characters with uppercase, lowercase, and numbers"
 
         try:
-            if USE_POSTGRES and psycopg is not None:
-                with psycopg.connect(DATABASE_URL) as conn:
-                    with conn.cursor() as c:
-                        c.execute("SELECT id, password_hash FROM users WHERE username = %s", (username,))
-                        result = c.fetchone()
-                        if not result:
-                            return False, "❌ User not found"
-                        user_id, password_hash = result
-                        if isinstance(password_hash, str):
-                            password_hash_bytes = password_hash.encode()
-                        else:
-                            password_hash_bytes = password_hash
-                        if not bcrypt.checkpw(old_password.encode(), password_hash_bytes):
-                            return False, "❌ Current password is incorrect"
-                        new_password_hash = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt(rounds=12)).decode()
-                        c.execute(
-                            "UPDATE users SET password_hash = %s, updated_at = %s WHERE id = %s",
-                            (new_password_hash, datetime.now(), user_id),
-                        )
-                        conn.commit()
-                    logger.info(f"✅ Password changed for user: {username}")
-                    return True, "✅ Password changed successfully"
-
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("SELECT id, password_hash FROM users WHERE username = ?", (username,))
-            result = c.fetchone()
-
-            if not result:
+            user = self._fetch_user(username)
+            if not user:
                 return False, "❌ User not found"
 
-            user_id, password_hash = result
+            user_id, password_hash, _ = user
 
             # Verify old password
-            if not bcrypt.checkpw(old_password.encode(), password_hash):
+            if not _check_password(old_password, password_hash):
                 return False, "❌ Current password is incorrect"
 
             # Hash and update new password
-            new_password_hash = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt(rounds=12))
-            c.execute(
-                "UPDATE users SET password_hash = ?, updated_at = ? WHERE id = ?",
-                (new_password_hash, datetime.now(), user_id),
-            )
-            conn.commit()
-            conn.close()
+            new_password_hash = _hash_password(new_password)
+
+            if USE_POSTGRES and psycopg is not None:
+                with self._pg_connection() as conn:
+                    with conn.cursor() as c:
+                        c.execute(
+                            "UPDATE users SET password_hash = %s, updated_at = %s WHERE id = %s",
+                            (new_password_hash.decode(), datetime.now(), user_id),
+                        )
+                    conn.commit()
+            else:
+                with self._sqlite_conn() as conn:
+                    conn.execute(
+                        "UPDATE users SET password_hash = ?, updated_at = ? WHERE id = ?",
+                        (new_password_hash, datetime.now(), user_id),
+                    )
+                    conn.commit()
+            self._invalidate_user(username)
 
             logger.info(f"✅ Password changed for user: {username}")
             return True, "✅ Password changed successfully"
@@ -95,6 +95,44 @@ def add_reference(
         raise RuntimeError("Database operation failed. Please try again.") from e
 
 
+def add_references_bulk(
+    refs: List[Tuple], user_id: int = None, durable: bool = True
+) -> int:
+    """Insert many (title, authors, year, doi, bibtex) rows in one transaction.
+
+    A row may carry its own owner as a sixth element; otherwise `user_id` is
+    used. Rows whose DOI already exists are skipped. Returns the number inserted.
+    With durable=False the commit does not wait for the WAL flush, which is
+    fine for re-runnable seed data.
+    """
+    if not refs:
+        return 0
+    try:
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as c:
+                if not durable:
+                    c.execute("SET LOCAL synchronous_commit = off")
+                c.executemany(
+                    """
+                    INSERT INTO references_tbl (title, authors, year, doi, bibtex, user_id)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (doi) DO NOTHING
+                    """,
+                    [ref if len(ref) == 6 else (*ref, user_id) for ref in refs],
+                )
+                inserted = c.rowcount
+            conn.commit()
+            logger.info(f"✅ Added {inserted} reference(s) in bulk")
+            return inserted
+        finally:
+            db_pool.return_connection(conn)
+
+    except Exception as e:
+        logger.error(f"❌ Failed to add references in bulk: {str(e)}")
+        raise RuntimeError("Database operation failed. Please try again.") from e
+
+
 def get_references(user_id: int = None) -> List[Dict[str, Any]]:
     """Get all references with automatic retry logic"""
     try:
@@ -0,0 +1,25 @@
+# utils/document_cache.py
+"""
+Process-wide cache of parsed documents.
+
+Text extraction (especially PDF) is the slowest step of most features, so parsed
+output is kept keyed by path, modification time and size; re-uploading or editing
+a file changes the key and forces a fresh parse.
+"""
+
+import streamlit as st
+from pathlib import Path
+from typing import Dict, Tuple
+from utils.document_handler import load_document
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def cached_load(path_str: str, mtime: float, size: int) -> Tuple[str, Dict]:
+    """Load a document once per (path, mtime, size). Treat the result as read-only."""
+    return load_document(Path(path_str))
+
+
+def load_document_cached(file_path: Path) -> Tuple[str, Dict]:
+    """Drop-in replacement for `load_document` backed by `cached_load`."""
+    stat = file_path.stat()
+    return cached_load(str(file_path), stat.st_mtime, stat.st_size)
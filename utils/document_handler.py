@@ -12,7 +12,8 @@ from docx import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 import faiss
 import numpy as np
-from typing import Dict, List, Tuple
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from config import VECTOR_DB_DIR, logger, UPLOAD_DIR
 from langchain_community.document_loaders import TextLoader  # For .tex as text
@@ -103,13 +104,16 @@ def chunk_text(text: str) -> List[str]:
     """Chunk text using LangChain splitter."""
     return text_splitter.split_text(text)
 
-def create_vector_store(chunks: List[str], file_name: str, store_dir: Path = None) -> None:
+def create_vector_store(chunks: List[str], file_name: str, store_dir: Path = None,
+                        executor: Optional[Executor] = None, batch_size: int = 32) -> None:
     """Create and save FAISS index.
     
     Args:
         chunks: Text chunks to embed
         file_name: Name of the file
         store_dir: Directory to save the vector store (defaults to VECTOR_DB_DIR)
+        executor: Optional executor used to embed chunk batches concurrently
+        batch_size: Chunks per embedding request when an executor is given
     """
     from utils.llm import get_embeddings
     
@@ -122,7 +126,16 @@ def create_vector_store(chunks: List[str], file_name: str, store_dir: Path = Non
         logger.warning(f"No non-empty chunks for {file_name}; skipping vector store creation")
         return
 
-    embeddings = get_embeddings(filtered_chunks)
+    if executor is None:
+        embeddings = get_embeddings(filtered_chunks)
+    else:
+        batches = [filtered_chunks[i:i + batch_size] for i in range(0, len(filtered_chunks), batch_size)]
+        batch_embeddings = list(executor.map(get_embeddings, batches))
+        # A failed batch comes back empty; don't build an index misaligned with the chunks
+        if any(len(embs) != len(batch) for embs, batch in zip(batch_embeddings, batches)):
+            logger.error(f"Embedding generation failed for part of {file_name}")
+            return
+        embeddings = [emb for embs in batch_embeddings for emb in embs]
     if not embeddings:
         logger.error(f"Embedding generation returned no embeddings for {file_name}")
         return
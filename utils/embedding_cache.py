@@ -0,0 +1,117 @@
+# utils/embedding_cache.py
+"""
+Persistent embedding cache shared by all modules.
+
+Embeddings are stored in SQLite keyed by sha256(model + text), so restarts,
+session resets and different features reuse vectors computed earlier. Only
+cache misses are sent to the embedding model, in a single batch. The least
+recently used entries are evicted once the cache grows past MAX_ENTRIES.
+"""
+
+import hashlib
+import sqlite3
+import time
+from typing import List
+
+import numpy as np
+from config import CACHE_DIR, EMBEDDING_MODEL, logger
+from utils.llm import get_embeddings
+
+EMBEDDING_CACHE_PATH = CACHE_DIR / "embeddings.db"
+# ~1.5 KB per 384-d float32 vector, so roughly 300 MB at the limit
+MAX_ENTRIES = 200_000
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(EMBEDDING_CACHE_PATH, timeout=10)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS embeddings (
+            key TEXT PRIMARY KEY,
+            vector BLOB NOT NULL,
+            last_access REAL NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)")
+    return conn
+
+
+def _key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}:{text}".encode()).hexdigest()
+
+
+def cached_embeddings(texts: List[str], model: str = EMBEDDING_MODEL) -> List[np.ndarray]:
+    """Embeddings for `texts`, computing only the ones not already cached.
+
+    Mirrors `get_embeddings`: empty/whitespace-only texts are dropped and an
+    empty list is returned if embedding fails.
+
+    Args:
+        texts: Strings to embed.
+        model: Embedding model name (part of the cache key).
+
+    Returns:
+        List of float32 vectors, one per non-empty text.
+    """
+    if isinstance(texts, str):
+        texts = [texts]
+    texts = [t for t in texts if t and str(t).strip()]
+    if not texts:
+        return []
+
+    keys = [_key(model, t) for t in texts]
+    found = {}
+    try:
+        conn = _connect()
+        try:
+            unique_keys = list(dict.fromkeys(keys))
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(unique_keys), 500):
+                batch = unique_keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                for key, blob in conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ):
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                conn.executemany("UPDATE embeddings SET last_access = ? WHERE key = ?", [(now, k) for k in found])
+                conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning(f"Embedding cache read failed: {e}")
+
+    missing = list(dict.fromkeys(t for t, k in zip(texts, keys) if k not in found))
+    if missing:
+        new_embeddings = get_embeddings(missing)
+        if len(new_embeddings) != len(missing):
+            return []
+        new_rows = []
+        for text, emb in zip(missing, new_embeddings):
+            vector = np.asarray(emb, dtype=np.float32)
+            found[_key(model, text)] = vector
+            new_rows.append((_key(model, text), vector.tobytes(), time.time()))
+        try:
+            conn = _connect()
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)", new_rows
+                )
+                # Evict least recently used entries beyond the limit
+                conn.execute(
+                    """
+                    DELETE FROM embeddings WHERE key IN (
+                        SELECT key FROM embeddings ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (MAX_ENTRIES,),
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    return [found[k] for k in keys]
@@ -1,10 +1,12 @@
 # utils/llm.py
 import ollama
+import threading
 from typing import List, Union, Optional
 from config import OLLAMA_MODEL, EMBEDDING_MODEL, logger
 
 # Defer heavy SentenceTransformer import/initialization until embeddings are needed
 embedder: Optional[object] = None
+_embedder_lock = threading.Lock()
 
 def ask_llm(prompt: str, model: str = OLLAMA_MODEL, temperature: float = 0.7) -> str:
     """Unified LLM interface using Ollama.
@@ -49,8 +51,11 @@ def get_embeddings(texts: Union[str, List[str]]) -> List[List[float]]:
         # Lazy-init embedder to avoid importing transformers at module import time
         global embedder
         if embedder is None:
-            from sentence_transformers import SentenceTransformer
-            embedder = SentenceTransformer(EMBEDDING_MODEL)
+            # Locked so concurrent embedding batches don't each load the model
+            with _embedder_lock:
+                if embedder is None:
+                    from sentence_transformers import SentenceTransformer
+                    embedder = SentenceTransformer(EMBEDDING_MODEL)
 
         embeddings = embedder.encode(texts)
     except Exception as e:
@@ -1,17 +1,82 @@
 # utils/nlp_helpers.py
+import os
 import spacy
-from typing import List
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Optional
 from config import logger
 
 nlp = spacy.load("en_core_web_sm")
 
+# Texts longer than this are split and analyzed in worker processes
+SHARD_SIZE = 10000
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+def topic_counts(text: str) -> Counter:
+    """Count candidate topic terms (entities plus non-stopword noun lemmas) in text."""
+    doc = nlp(text)
+    keywords = [ent.text for ent in doc.ents] + [token.lemma_ for token in doc if token.pos_ in ["NOUN", "PROPN"] and not token.is_stop]
+    return Counter(keywords)
+
 def extract_topics(text: str, top_n: int = 10) -> List[str]:
     """Extract key topics using spaCy."""
     try:
-        doc = nlp(text)
-        keywords = [ent.text for ent in doc.ents] + [token.lemma_ for token in doc if token.pos_ in ["NOUN", "PROPN"] and not token.is_stop]
-        from collections import Counter
-        return [word for word, count in Counter(keywords).most_common(top_n)]
+        return [word for word, count in topic_counts(text).most_common(top_n)]
+    except Exception as e:
+        logger.error(f"NLP error: {e}")
+        return []
+
+def split_into_shards(text: str, shard_size: int = SHARD_SIZE) -> List[str]:
+    """Split text into ~shard_size pieces, breaking on whitespace so words stay intact."""
+    shards = []
+    start = 0
+    while start < len(text):
+        end = min(start + shard_size, len(text))
+        if end < len(text):
+            space = text.rfind(" ", start, end)
+            if space > start:
+                end = space
+        shards.append(text[start:end])
+        start = end
+    return shards
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+    return _executor
+
+def iter_topic_counts(text: str, shard_size: int = SHARD_SIZE) -> Iterator[Counter]:
+    """Yield running topic counts as shards of text finish processing.
+
+    Short texts are analyzed in-process; longer ones are sharded across a shared
+    process pool so callers can render partial results while the rest completes.
+    Each yield is a fresh Counter, so callers may keep earlier partial results.
+    If a worker dies, the pool is discarded and the remaining shards are
+    counted in-process.
+    """
+    global _executor
+    try:
+        shards = split_into_shards(text, shard_size)
+        if len(shards) <= 1:
+            yield topic_counts(text)
+            return
+
+        totals = Counter()
+        remaining = dict(enumerate(shards))
+        try:
+            futures = {_get_executor().submit(topic_counts, shard): i for i, shard in remaining.items()}
+            for future in as_completed(futures):
+                totals.update(future.result())
+                del remaining[futures[future]]
+                yield Counter(totals)
+        except BrokenProcessPool as e:
+            logger.warning(f"NLP worker pool broke, counting {len(remaining)} shards in-process: {e}")
+            _executor = None
+            for shard in remaining.values():
+                totals.update(topic_counts(shard))
+            yield Counter(totals)
     except Exception as e:
         logger.error(f"NLP error: {e}")
-        return []
\ No newline at end of file
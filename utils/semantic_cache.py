@@ -0,0 +1,189 @@
+# utils/semantic_cache.py
+"""
+Semantic cache for LLM completions.
+
+Prompts are embedded and compared against previously answered prompts in the
+same namespace; a close enough match (cosine >= threshold) returns the stored
+completion instead of querying the LLM again. Entries live in a small SQLite
+file so the cache survives restarts and is shared between sessions and users.
+Callers whose prompts embed user content behind a fixed template pass
+`exact=True`, which only reuses answers to the identical prompt. Expired rows
+are deleted on write and each namespace keeps at most MAX_ENTRIES_PER_NAMESPACE.
+"""
+
+import hashlib
+import sqlite3
+import time
+from typing import Optional
+
+import numpy as np
+from config import CACHE_DIR, logger
+from utils.embedding_cache import cached_embeddings
+from utils.llm import ask_llm
+
+SEMANTIC_CACHE_PATH = CACHE_DIR / "semantic_cache.db"
+SIMILARITY_THRESHOLD = 0.92
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+# Sampling above this temperature is meant to vary between calls, so it is never cached
+MAX_CACHEABLE_TEMPERATURE = 0.4
+# Bounds the table and the rows each semantic lookup scans
+MAX_ENTRIES_PER_NAMESPACE = 1000
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(SEMANTIC_CACHE_PATH, timeout=10)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            namespace TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            prompt_hash TEXT
+        )
+        """
+    )
+    # Caches created before exact matching lack the column; their rows keep a
+    # NULL hash and so only ever serve semantic lookups
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(llm_cache)")}
+    if "prompt_hash" not in columns:
+        conn.execute("ALTER TABLE llm_cache ADD COLUMN prompt_hash TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_namespace ON llm_cache(namespace, created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_prompt ON llm_cache(namespace, prompt_hash)")
+    return conn
+
+
+def _prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode()).hexdigest()
+
+
+def _normalize(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+def lookup(namespace: str, embedding: np.ndarray, threshold: float = SIMILARITY_THRESHOLD,
+           ttl: float = DEFAULT_TTL_SECONDS) -> Optional[str]:
+    """Return the cached response closest to `embedding` if it clears `threshold`.
+
+    Args:
+        namespace: Cache partition (usually the calling feature).
+        embedding: L2-normalized prompt embedding.
+        threshold: Minimum cosine similarity for a hit.
+        ttl: Maximum entry age in seconds.
+
+    Returns:
+        Cached response text, or None on a miss.
+    """
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            "SELECT embedding, response FROM llm_cache WHERE namespace = ? AND created_at > ?",
+            (namespace, time.time() - ttl),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    candidates = [(np.frombuffer(blob, dtype=np.float32), response) for blob, response in rows]
+    candidates = [(vec, response) for vec, response in candidates if vec.shape == embedding.shape]
+    if not candidates:
+        return None
+
+    # Stored embeddings are normalized, so cosine similarity is a plain dot product
+    sims = np.stack([vec for vec, _ in candidates]) @ embedding
+    best = int(np.argmax(sims))
+    if sims[best] >= threshold:
+        return candidates[best][1]
+    return None
+
+
+def lookup_exact(namespace: str, prompt: str, ttl: float = DEFAULT_TTL_SECONDS) -> Optional[str]:
+    """Return the cached response to exactly `prompt`, or None on a miss."""
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT response FROM llm_cache WHERE namespace = ? AND prompt_hash = ? AND created_at > ? "
+            "ORDER BY created_at DESC LIMIT 1",
+            (namespace, _prompt_hash(prompt), time.time() - ttl),
+        ).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def store(namespace: str, prompt: str, embedding: Optional[np.ndarray], response: str,
+          ttl: float = DEFAULT_TTL_SECONDS) -> None:
+    """Persist a completion under its prompt hash and normalized embedding.
+
+    Expired rows are deleted and the namespace is trimmed to the newest
+    MAX_ENTRIES_PER_NAMESPACE entries in the same transaction.
+    """
+    blob = embedding.astype(np.float32).tobytes() if embedding is not None else b""
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute(
+            "INSERT INTO llm_cache (namespace, embedding, response, created_at, prompt_hash) VALUES (?, ?, ?, ?, ?)",
+            (namespace, blob, response, now, _prompt_hash(prompt)),
+        )
+        conn.execute("DELETE FROM llm_cache WHERE created_at <= ?", (now - ttl,))
+        conn.execute(
+            """
+            DELETE FROM llm_cache WHERE id IN (
+                SELECT id FROM llm_cache WHERE namespace = ? ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (namespace, MAX_ENTRIES_PER_NAMESPACE),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def cached_ask_llm(prompt: str, namespace: str, temperature: float = 0.7,
+                   threshold: float = SIMILARITY_THRESHOLD, ttl: float = DEFAULT_TTL_SECONDS,
+                   exact: bool = False) -> str:
+    """`ask_llm` with a semantic cache in front of it.
+
+    Only low-temperature calls are cached; hotter calls go straight to the LLM.
+
+    Args:
+        prompt: The input prompt.
+        namespace: Cache partition so unrelated features never share answers.
+        temperature: Creativity level (0-1).
+        threshold: Minimum cosine similarity for a cache hit.
+        ttl: Maximum entry age in seconds.
+        exact: Only reuse answers to this exact prompt (no similarity match).
+
+    Returns:
+        Generated (or cached) text.
+    """
+    if temperature > MAX_CACHEABLE_TEMPERATURE:
+        return ask_llm(prompt, temperature=temperature)
+
+    embedding = None
+    try:
+        if exact:
+            cached = lookup_exact(namespace, prompt, ttl=ttl)
+        else:
+            cached = None
+            prompt_emb = cached_embeddings([prompt])
+            if prompt_emb:
+                embedding = _normalize(prompt_emb[0])
+                cached = lookup(namespace, embedding, threshold=threshold, ttl=ttl)
+        if cached is not None:
+            logger.info(f"Semantic cache hit ({namespace})")
+            return cached
+    except Exception as e:
+        logger.warning(f"Semantic cache lookup failed: {e}")
+
+    response = ask_llm(prompt, temperature=temperature)
+
+    if exact or embedding is not None:
+        try:
+            store(namespace, prompt, embedding, response, ttl=ttl)
+        except Exception as e:
+            logger.warning(f"Semantic cache store failed: {e}")
+    return response